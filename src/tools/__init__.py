@@ -1,5 +1,14 @@
 from .google_news import GoogleNewsTool
+from .http_clients import HttpClientRegistry, http_clients, get_http_client, close_http_clients
 from .linkedin_tool import LinkedinDataTool
 from .scaleserp_browser import ScaleSerpBrowserTool
 
-__all__ = ["GoogleNewsTool", "LinkedinDataTool", "ScaleSerpBrowserTool"]
+__all__ = [
+    "GoogleNewsTool",
+    "LinkedinDataTool",
+    "ScaleSerpBrowserTool",
+    "HttpClientRegistry",
+    "http_clients",
+    "get_http_client",
+    "close_http_clients",
+]
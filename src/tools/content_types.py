@@ -0,0 +1,88 @@
+import codecs
+import re
+
+
+HTML_TYPES = {"text/html", "application/xhtml+xml"}
+# Textual content we pass through as-is instead of running it through the HTML converter
+TEXT_TYPES = {
+    "text/plain", "text/markdown", "text/csv", "text/xml", "application/json",
+    "application/xml", "application/rss+xml", "application/atom+xml",
+}
+# Bytes inspected when sniffing the body or looking for a <meta charset>
+SNIFF_BYTES = 4096
+
+META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9_.:-]+)""", re.IGNORECASE)
+BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def mime_type(content_type: str | None) -> str:
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def classify_content(content_type: str | None, content_length: str | int | None = None,
+                     max_body_bytes: int | None = None, head: bytes = b"") -> tuple[str | None, str | None]:
+    """Decides from the response headers (and optionally the first body bytes) what to do with a page.
+
+    Returns `(kind, skip_reason)`: kind is 'html' or 'text' for content we can use, otherwise
+    kind is None and `skip_reason` says why the page was skipped.
+    """
+    if max_body_bytes is not None and content_length is not None:
+        try:
+            length = int(content_length)
+        except (TypeError, ValueError):
+            length = None
+        if length is not None and length > max_body_bytes:
+            return None, f"body of {length} bytes exceeds the {max_body_bytes} byte limit"
+
+    mime = mime_type(content_type)
+    if mime in HTML_TYPES:
+        return "html", None
+    if mime in TEXT_TYPES or mime.endswith("+json") or mime.endswith("+xml"):
+        return "text", None
+    if mime:
+        return None, f"unsupported content type {mime}"
+
+    # No Content-Type header, sniff the first bytes instead
+    if head.startswith(b"%PDF"):
+        return None, "unsupported content type application/pdf"
+    if b"\x00" in head[0:SNIFF_BYTES]:
+        return None, "binary content"
+    return "html", None
+
+
+def detect_charset(content_type: str | None, head: bytes) -> str | None:
+    """Charset from the Content-Type header, a byte order mark, or a <meta charset> tag."""
+    match = re.search(r"charset\s*=\s*[\"']?([A-Za-z0-9_.:-]+)", content_type or "", re.IGNORECASE)
+    candidates = [match.group(1)] if match else []
+    for bom, name in BOMS:
+        if head.startswith(bom):
+            candidates.append(name)
+    meta = META_CHARSET_RE.search(head[0:SNIFF_BYTES])
+    if meta:
+        candidates.append(meta.group(1).decode("ascii", errors="ignore"))
+
+    for name in candidates:
+        try:
+            return codecs.lookup(name).name
+        except LookupError:
+            continue
+    return None
+
+
+def decode_body(body: bytes, content_type: str | None = None) -> str:
+    """Decodes a (possibly truncated) body with its declared charset, falling back to
+    UTF-8 and then Windows-1252, the usual encoding of undeclared legacy pages."""
+    charset = detect_charset(content_type, body[0:SNIFF_BYTES])
+    if charset is not None:
+        return body.decode(charset, errors="replace")
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A truncated body can end mid-character, which is not a reason to give up on UTF-8
+        if e.start >= len(body) - 3:
+            return body.decode("utf-8", errors="replace")
+        return body.decode("cp1252", errors="replace")
@@ -0,0 +1,120 @@
+import asyncio
+import heapq
+import re
+from typing import TYPE_CHECKING
+from urllib.parse import urljoin, urlsplit
+
+from .html_text import extract_links
+from .http_clients import get_http_client
+from .page_cache import normalize_url
+
+if TYPE_CHECKING:
+    from .scaleserp_browser import ScaleSerpBrowserTool
+
+
+# Path words of the pages that tell the most about a company, lower is fetched first
+PATH_PRIORITIES = {
+    "about": 0, "team": 0, "leadership": 0, "company": 0, "pricing": 0,
+    "product": 1, "products": 1, "platform": 1, "solutions": 1, "customers": 1, "features": 1,
+    "careers": 2, "jobs": 2, "contact": 2, "press": 2, "news": 2, "investors": 2,
+    "blog": 3, "docs": 3,
+}
+# Paths that are never worth fetching as text
+SKIP_PATH_RE = re.compile(
+    r"\.(pdf|jpe?g|png|gif|svg|webp|ico|css|js|json|xml|zip|gz|mp3|mp4|mov|avi|woff2?|ttf)$"
+    r"|/(login|signin|sign-in|signup|sign-up|register|cart|checkout|search|wp-admin)\b",
+    re.IGNORECASE,
+)
+
+
+def site_of(url: str) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def link_priority(url: str, depth: int) -> float:
+    """Crawl priority of a link, lower first: shallow pages and well known section names win."""
+    path = urlsplit(url).path.lower()
+    words = [word for word in re.split(r"[/_.-]+", path) if word]
+    best = min((PATH_PRIORITIES.get(word, 5) for word in words), default=5)
+    # Deep paths are usually leaf pages (single posts, docs pages)
+    return depth * 10 + best + 0.5 * max(0, len(words) - 1)
+
+
+class SiteCrawler():
+    """Bounded, same-site crawl from one or more seed URLs.
+
+    The frontier is a priority queue (see `link_priority`) and a set of normalized URLs
+    makes sure no page is queued twice. Pages are fetched with the browser tool's
+    `scheduled_download` and converted with its `convert_page`, so caching, content-type
+    gating and per-host rate control all apply.
+    """
+
+    def __init__(self, browser: "ScaleSerpBrowserTool", max_depth: int = 1, max_pages: int = 10,
+                 per_host_concurrency: int = 4):
+        self.browser = browser
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.per_host_concurrency = per_host_concurrency
+
+    async def crawl(self, seed_urls: list[str], max_chars: int) -> list[dict]:
+        """Crawls from `seed_urls` and returns the converted pages in fetch order."""
+        frontier: list[tuple[float, int, str, int]] = []
+        seen: set[str] = set()
+        sites = set()
+        for url in seed_urls:
+            if not url.startswith("http"):
+                url = "https://" + url
+            sites.add(site_of(url))
+            self._push(frontier, seen, url, 0)
+
+        client = get_http_client("web")
+        concurrency = self.per_host_concurrency * max(1, len(sites))
+        sem = asyncio.Semaphore(concurrency)
+        host_sems: dict[str, asyncio.Semaphore] = {}
+        max_bytes = max_chars * self.browser.bytes_per_char
+
+        async def fetch(url: str, depth: int) -> tuple[dict, int]:
+            # Pages whose links are followed are read whole, links often come after a long <head>;
+            # the text is still converted within `max_chars`
+            page_bytes = self.browser.max_page_bytes if depth < self.max_depth else max_bytes
+            host_sem = host_sems.setdefault(site_of(url), asyncio.Semaphore(self.per_host_concurrency))
+            async with host_sem:
+                res_dict = await self.browser.scheduled_download(client, url, url[0:40], sem, page_bytes)
+            return res_dict, depth
+
+        pages: list[dict] = []
+        in_flight: set[asyncio.Task] = set()
+        started = 0
+        try:
+            while frontier or in_flight:
+                while frontier and started < self.max_pages and len(in_flight) < concurrency:
+                    _, _, url, depth = heapq.heappop(frontier)
+                    in_flight.add(asyncio.create_task(fetch(url, depth)))
+                    started += 1
+                if not in_flight:
+                    break
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    res_dict, depth = task.result()
+                    if "content" not in res_dict:
+                        pages.append(res_dict)
+                        continue
+                    if depth < self.max_depth and res_dict.get("kind", "html") == "html":
+                        for link in extract_links(res_dict["content"]):
+                            link = urljoin(res_dict["url"], link).split("#")[0]
+                            if link.startswith("http") and site_of(link) in sites and not SKIP_PATH_RE.search(link):
+                                self._push(frontier, seen, link, depth + 1)
+                    pages.append(await self.browser.convert_page(res_dict, max_chars))
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return pages
+
+    @staticmethod
+    def _push(frontier: list, seen: set[str], url: str, depth: int) -> None:
+        key = normalize_url(url)
+        if key in seen:
+            return
+        seen.add(key)
+        heapq.heappush(frontier, (link_priority(url, depth), len(seen), url, depth))
@@ -1,17 +1,60 @@
-from typing import Any, Callable, List, Dict
+import asyncio
+import threading
+from typing import Any, Callable, ClassVar, List, Dict
 from collections import Counter
-from datetime import date
+from datetime import date, timedelta
 
+import httpx
 import pandas as pd
-from googlenewsdecoder import new_decoderv1
-from google_news_feed import GoogleNewsFeed, NewsItem
-
+from google_news_feed import BASE_URL, GOOGLE_INTERNAL_URL, KNOWN_TOPICS, GoogleNewsFeed, NewsItem
+
+from .html_text import extract_links
+from .http_clients import get_http_client
+from .news_archive import NewsArchive
+from .news_frame import news_frame, news_items_to_columns
+from .near_duplicates import cluster_texts, cluster_titles
+from .news_links import GoogleNewsLinkDecoder
+from .rss_parser import RSS_COLUMNS, RssColumnParser
 from .scaleserp_browser import ScaleSerpBrowserTool
+from .sync_loop import run_sync
+from .trending import TrendingTopics
+from .ttl_cache import TTLCache
 
 class GoogleNewsTool():
     browser_tool: ScaleSerpBrowserTool = None
-
-    def __init__(self):
+    # Seconds a feed stays fresh, per endpoint. Searches bounded by a past `before` date
+    # no longer change, so they are kept much longer.
+    FEED_TTLS: ClassVar[dict[str, float]] = {
+        "headlines": 5 * 60,
+        "topic": 10 * 60,
+        "search": 10 * 60,
+        "historical": 24 * 60 * 60,
+    }
+    # Shared by all instances, so headlines fetched for one call serve the next ones
+    feed_cache: ClassVar[TTLCache] = TTLCache(ttl=5 * 60, stale_ttl=30 * 60)
+    # Google News returns at most this many items per feed, a full feed has probably been cut short
+    FEED_ITEM_CAP: ClassVar[int] = 100
+    # Trending topic state per feed, e.g. 'headlines-en-US', shared by all instances
+    trending_engines: ClassVar[dict[str, TrendingTopics]] = {}
+    _trending_lock: ClassVar[threading.Lock] = threading.Lock()
+    # One decoder for all instances, so its thread pool bounds the decodes of the whole process
+    # and every instance shares the decoded links; created on first use
+    _link_decoder: ClassVar[GoogleNewsLinkDecoder | None] = None
+    _link_decoder_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self, cache_feeds: bool = True, arrow_frames: bool = False, track_trends: bool = True,
+                 archive_news: bool = False):
+        """
+        Args:
+            cache_feeds: Reuse recently fetched RSS feeds (see FEED_TTLS), serving stale ones
+                while they are refreshed in the background.
+            arrow_frames: Return DataFrames backed by pyarrow (when it is installed, see the 'arrow' extra).
+            track_trends: Feed every headline seen by the topic methods into a time-decayed
+                trending engine (see `trending.TrendingTopics`), instead of counting the words
+                of the current feed only. The state persists under $TOOLS_CACHE_DIR when set.
+            archive_news: Save every news item fetched, and the text of downloaded articles, into a
+                local full-text archive (under $TOOLS_CACHE_DIR when set) for `search_news_archive`.
+        """
 #         super().__init__(
 #             id = "google_news_connector",
 #             system_name = "Google News",
@@ -24,43 +67,259 @@ class GoogleNewsTool():
 #         )
 
         self.browser_tool = ScaleSerpBrowserTool()
+        self.cache_feeds = cache_feeds
+        self.arrow_frames = arrow_frames
+        self.track_trends = track_trends
+        self.archive: NewsArchive | None = NewsArchive.from_env() if archive_news else None
 
     def get_tools(self) -> list[Callable]:
         return self.wrap_tool_functions([
             self.get_top_headlines,
             self.query_topic,
             self.query_news,
+            self.query_news_batch,
             self.get_category_news,
             self.get_location_news,
             self.get_local_topics,
             self.get_trending_topics,
             self.explain_search_syntax,
             self.download_news_article,
+            self.download_news_articles,
+            self.search_news_archive,
         ])
 
-    def _news_items_to_df(self, news_items: List[NewsItem]) -> dict:
-        df = pd.DataFrame([item.__dict__ for item in news_items])
-        df['pubDate'] = pd.to_datetime(df['pubDate'], utc=True)
-        df['pubDate'] = df['pubDate'].dt.date
-        return df
-
-    def get_top_headlines(self, language: str = 'en', country: str = 'US') -> pd.DataFrame:
-        """Gets top headlines for the specified language and country."""
-        gnf = GoogleNewsFeed(language=language, country=country)
-        results = gnf.top_headlines()
-        return self._news_items_to_df(results)
+    @property
+    def link_decoder(self) -> GoogleNewsLinkDecoder:
+        with self._link_decoder_lock:
+            if GoogleNewsTool._link_decoder is None:
+                GoogleNewsTool._link_decoder = GoogleNewsLinkDecoder()
+            return GoogleNewsTool._link_decoder
+
+    def _news_items_to_df(self, news_items: List[NewsItem]) -> pd.DataFrame:
+        return self._feed_to_df(news_items_to_columns(news_items))
+
+    def _feed_to_df(self, columns: Dict[str, list], extra_columns: Dict[str, list] | None = None) -> pd.DataFrame:
+        if extra_columns:
+            columns = {**columns, **extra_columns}
+        return news_frame(columns, arrow=self.arrow_frames)
+
+    @staticmethod
+    def feed_key(endpoint: str, language: str, country: str, query: str | None = None,
+                 before: date = None, after: date = None, when: str = None,
+                 resolve_internal_links: bool = True, max_results: int | None = None) -> tuple:
+        """ Cache key of a feed request. `when` takes precedence over before/after in the feed URL,
+        so those are only part of the key without it. """
+        if when:
+            before = after = None
+        return (endpoint, query, language.lower(), country.upper(), before, after, when, resolve_internal_links,
+                max_results)
+
+    def feed_ttl(self, endpoint: str, before: date = None, when: str = None) -> float:
+        if endpoint == "search" and not when and before is not None and before < date.today():
+            return self.FEED_TTLS["historical"]
+        return self.FEED_TTLS[endpoint]
+
+    @staticmethod
+    def feed_url(endpoint: str, language: str, country: str, query: str | None = None,
+                 before: date = None, after: date = None, when: str = None) -> str:
+        """ RSS URL of the 'headlines', 'topic' or 'search' feed, as built by `GoogleNewsFeed`. """
+        language = language.lower()
+        country = country.upper()
+        ceid = GoogleNewsFeed._build_ceid(country, language)
+        if endpoint == "headlines":
+            return f"{BASE_URL}?{ceid}"
+        if endpoint == "topic":
+            topic = KNOWN_TOPICS.get(query.upper(), query)
+            return f"{BASE_URL}/topics/{topic}?{ceid}"
+        return GoogleNewsFeed._build_query_url(query, country, language, before, after, when)
+
+    async def _afetch_feed(self, endpoint: str, language: str, country: str, query: str | None = None,
+                           before: date = None, after: date = None, when: str = None,
+                           resolve_internal_links: bool = True, max_results: int | None = None) -> Dict[str, list]:
+        """ Fetches the 'headlines', 'topic' or 'search' feed, through the feed cache.
+        Returns the items as column lists, reading at most `max_results` of them. """
+        async def fetch() -> Dict[str, list]:
+            url = self.feed_url(endpoint, language, country, query, before, after, when)
+            return await self._download_feed(url, resolve_internal_links, max_results)
+
+        if self.cache_feeds:
+            key = self.feed_key(endpoint, language, country, query, before, after, when, resolve_internal_links,
+                                max_results)
+            columns = await self.feed_cache.get_or_fetch(key, fetch, ttl=self.feed_ttl(endpoint, before, when))
+        else:
+            columns = await fetch()
+        # Also for cached feeds, which may have been fetched by an instance without an archive;
+        # items already archived are ignored
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.save, columns)
+        return columns
+
+    async def _download_feed(self, url: str, resolve_internal_links: bool,
+                             max_results: int | None = None) -> Dict[str, list]:
+        """ Streams the feed into an `RssColumnParser`, and stops reading once `max_results` items are in. """
+        client = get_http_client("google_news")
+        parser = RssColumnParser(max_results)
+        async with client.stream("GET", url, follow_redirects=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Error fetching feed: {url}")
+            async for chunk in response.aiter_bytes():
+                if parser.feed(chunk):
+                    break
+        columns = parser.close()
+        if resolve_internal_links:
+            columns["link"] = await self._resolve_internal_links(client, columns["link"])
+        return columns
+
+    async def _resolve_internal_links(self, client: httpx.AsyncClient, links: List[str],
+                                      max_concurrency: int = 10) -> List[str]:
+        """ Replaces news.google.com links with the first link of the page they point to, concurrently. """
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def resolve(link: str | None) -> str | None:
+            if not link or not any(link.startswith(internal) for internal in GOOGLE_INTERNAL_URL):
+                return link
+            try:
+                async with sem:
+                    response = await client.get(link, follow_redirects=True)
+                page_links = extract_links(response.text)
+                if page_links:
+                    return page_links[0]
+            except Exception as e:
+                print(f"Failed to resolve internal link {link}: {e}")
+            return link
+
+        return list(await asyncio.gather(*[resolve(link) for link in links]))
+
+    def trending_engine(self, name: str) -> TrendingTopics:
+        with self._trending_lock:
+            engine = self.trending_engines.get(name)
+            if engine is None:
+                engine = TrendingTopics.from_env(name)
+                self.trending_engines[name] = engine
+            return engine
+
+    async def _track_headlines(self, name: str, titles: List[str | None], exclude: set[str] = frozenset()) -> TrendingTopics:
+        engine = self.trending_engine(name)
+        # Saving the state touches the disk, keep it off the loop
+        await asyncio.to_thread(engine.add, [title for title in titles if title], exclude=exclude)
+        return engine
+
+    def feed_cache_stats(self) -> dict:
+        """Hit and miss counts of the shared feed cache."""
+        return self.feed_cache.stats()
+
+    def _collapse_stories(self, df: pd.DataFrame) -> pd.DataFrame:
+        """ Keeps one row per story: rows whose titles are near-duplicates of an earlier row are dropped,
+        and 'story_size' counts the rows of each story. """
+        if df.empty:
+            return df.assign(story_size=pd.Series(dtype=int))
+        stories = pd.Series(cluster_titles(list(df["title"])), index=df.index)
+        sizes = stories.map(stories.value_counts())
+        return df.assign(story_size=sizes)[~stories.duplicated()]
+
+    async def aget_top_headlines(self, language: str = 'en', country: str = 'US',
+                                 collapse_duplicates: bool = False) -> pd.DataFrame:
+        """Async version of `get_top_headlines`."""
+        results = await self._afetch_feed("headlines", language, country)
+        df = self._feed_to_df(results)
+        return self._collapse_stories(df) if collapse_duplicates else df
+
+    def get_top_headlines(self, language: str = 'en', country: str = 'US',
+                          collapse_duplicates: bool = False) -> pd.DataFrame:
+        """Gets top headlines for the specified language and country.
+        With collapse_duplicates, the same story from several outlets is returned once, with a 'story_size' count."""
+        return run_sync(self.aget_top_headlines(language, country, collapse_duplicates))
+
+    async def aquery_topic(self, topic: str, language: str = 'en', country: str = 'US') -> pd.DataFrame:
+        """Async version of `query_topic`."""
+        results = await self._afetch_feed("topic", language, country, topic)
+        return self._feed_to_df(results)
 
     def query_topic(self, topic: str, language: str = 'en', country: str = 'US') -> pd.DataFrame:
         """Gets new articles related to the specified topic."""
-        gnf = GoogleNewsFeed(language=language, country=country)
-        results = gnf.query_topic(topic)
-        return self._news_items_to_df(results)
+        return run_sync(self.aquery_topic(topic, language, country))
+
+    async def aquery_news(self, query: str, language: str = 'en', country: str = 'US',
+                          before: date = None, after: date = None, back_days: int = 1,
+                          exact_phrase: str = None, exclude_terms: List[str] = None,
+                          site: str = None, in_title: bool = False, in_url: bool = False,
+                          all_in_text: bool = False, collapse_duplicates: bool = False,
+                          backfill: bool = False, max_concurrency: int = 8) -> pd.DataFrame:
+        """Async version of `query_news`."""
+        # Construct advanced query
+        if exact_phrase:
+            query += f' "{exact_phrase}"'
+        if exclude_terms:
+            query += ' ' + ' '.join([f'-"{term}"' for term in exclude_terms])
+        if site:
+            query += f' site:{site}'
+        if in_title:
+            query = f'intitle:{query}'
+        if in_url:
+            query = f'inurl:{query}'
+        if all_in_text:
+            query = f'allintext:{query}'
+
+        if backfill:
+            df = await self._abackfill(query, language, country, before, after, back_days, max_concurrency)
+        else:
+            results = await self._afetch_feed("search", language, country, query, before=before, after=after,
+                                              when=f"{back_days}d", resolve_internal_links=False)
+            df = self._feed_to_df(results)
+        return self._collapse_stories(df) if collapse_duplicates else df
+
+    async def _abackfill(self, query: str, language: str, country: str, before: date | str | None,
+                         after: date | str | None, back_days: int, max_concurrency: int) -> pd.DataFrame:
+        """ Searches [after, before) window by window, at most `max_concurrency` feeds at a time.
+
+        The range starts as one window per slot. A window whose feed comes back full (FEED_ITEM_CAP)
+        is halved and both halves are fetched, down to single days, the finest range the search
+        accepts. Rows found by several windows are kept once, newest first. """
+        if isinstance(after, str):
+            after = date.fromisoformat(after)
+        if isinstance(before, str):
+            before = date.fromisoformat(before)
+        end = before or date.today() + timedelta(days=1)
+        start = after or (before or date.today()) - timedelta(days=back_days)
+        days = max(1, (end - start).days)
+        window_days = -(-days // max_concurrency)
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(first: date, last: date) -> List[Dict[str, list]]:
+            try:
+                async with sem:
+                    columns = await self._afetch_feed("search", language, country, query, before=last, after=first,
+                                                      resolve_internal_links=False)
+            except Exception as e:
+                print(f"News search for {query} from {first} to {last} failed: {e}")
+                return []
+            span = (last - first).days
+            if len(columns["title"]) < self.FEED_ITEM_CAP:
+                return [columns]
+            if span <= 1:
+                print(f"News search for {query} on {first} returned a full feed, some items may be missing")
+                return [columns]
+            middle = first + timedelta(days=span // 2)
+            halves = await asyncio.gather(fetch(first, middle), fetch(middle, last))
+            return [columns, *halves[0], *halves[1]]
+
+        windows = [(first, min(first + timedelta(days=window_days), end))
+                   for first in (start + timedelta(days=offset) for offset in range(0, days, window_days))]
+        results = await asyncio.gather(*[fetch(first, last) for first, last in windows])
+
+        feed = {name: [] for name in RSS_COLUMNS}
+        for columns in (columns for window in results for columns in window):
+            for name in RSS_COLUMNS:
+                feed[name].extend(columns.get(name, []))
+        df = self._feed_to_df(feed).drop_duplicates(subset=["link"])
+        return df.sort_values("pubDate", ascending=False, kind="stable").reset_index(drop=True)
 
     def query_news(self, query: str, language: str = 'en', country: str = 'US',
                    before: date = None, after: date = None, back_days: int = 1,
                    exact_phrase: str = None, exclude_terms: List[str] = None,
                    site: str = None, in_title: bool = False, in_url: bool = False,
-                   all_in_text: bool = False) -> pd.DataFrame:
+                   all_in_text: bool = False, collapse_duplicates: bool = False,
+                   backfill: bool = False, max_concurrency: int = 8) -> pd.DataFrame:
         """
         Searches for news articles based on the given query and parameters.
 
@@ -77,37 +336,85 @@ class GoogleNewsTool():
             in_title (bool): If True, search only in the title.
             in_url (bool): If True, search only in the URL.
             all_in_text (bool): If True, all words must appear in the body text.
+            collapse_duplicates (bool): If True, the same story from several outlets is returned once,
+                with a 'story_size' column counting its copies.
+            backfill (bool): If True, search the whole range (after to before, or back_days) day windows at
+                a time, instead of in one feed that holds at most about 100 items. Use it for long ranges.
+            max_concurrency (int): The most feeds fetched at the same time when back-filling.
 
         Returns:
             A DataFrame where each row is a news item.
         """
-        gnf = GoogleNewsFeed(language=language, country=country, resolve_internal_links=False)
+        return run_sync(self.aquery_news(query, language, country, before, after, back_days, exact_phrase,
+                                         exclude_terms, site, in_title, in_url, all_in_text,
+                                         collapse_duplicates, backfill, max_concurrency))
+
+    async def aquery_news_batch(self, queries: List[str | None], locales: List[tuple] = [('en', 'US')],
+                                back_days: int = 1, max_concurrency: int = 8) -> pd.DataFrame:
+        """Async version of `query_news_batch`."""
+        requests = [(query, language, country) for query in queries for language, country in locales]
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(query: str | None, language: str, country: str) -> Dict[str, list]:
+            async with sem:
+                if query is None:
+                    return await self._afetch_feed("headlines", language, country)
+                return await self._afetch_feed("search", language, country, query, when=f"{back_days}d",
+                                               resolve_internal_links=False)
+
+        results = await asyncio.gather(*[fetch(*request) for request in requests], return_exceptions=True)
+
+        feed = {name: [] for name in RSS_COLUMNS}
+        columns = {"query": [], "language": [], "country": []}
+        for (query, language, country), result in zip(requests, results):
+            if isinstance(result, Exception):
+                print(f"News query failed for {query} ({language}-{country}): {result}")
+                continue
+            count = len(result["title"])
+            for name, values in result.items():
+                feed[name].extend(values)
+            columns["query"].extend([query] * count)
+            columns["language"].extend([language] * count)
+            columns["country"].extend([country] * count)
+
+        df = self._feed_to_df(feed, columns)
+        # The same article often matches several queries of a sweep, keep its first match per locale
+        return df.drop_duplicates(subset=["link", "language", "country"]).reset_index(drop=True)
+
+    def query_news_batch(self, queries: List[str | None], locales: List[tuple] = [('en', 'US')],
+                         back_days: int = 1, max_concurrency: int = 8) -> pd.DataFrame:
+        """
+        Runs several news searches across several locales at once.
 
-        # Construct advanced query
-        if exact_phrase:
-            query += f' "{exact_phrase}"'
-        if exclude_terms:
-            query += ' ' + ' '.join([f'-"{term}"' for term in exclude_terms])
-        if site:
-            query += f' site:{site}'
-        if in_title:
-            query = f'intitle:{query}'
-        if in_url:
-            query = f'inurl:{query}'
-        if all_in_text:
-            query = f'allintext:{query}'
+        Args:
+            queries (List[str]): The search queries. None fetches the top headlines instead.
+            locales (List[tuple]): (language, country) pairs, every query runs in every locale.
+            back_days: Number of days back to retrieve news
+            max_concurrency (int): The most feeds fetched at the same time.
+
+        Returns:
+            A DataFrame where each row is a news item, with the query, language and country that
+            found it. An article found by more than one query of a locale appears once.
+        """
+        return run_sync(self.aquery_news_batch(queries, locales, back_days, max_concurrency))
 
-        results = gnf.query(query, before=before, after=after, when=f"{back_days}d")
-        return self._news_items_to_df(results)
+    async def aget_category_news(self, category: str, language: str = 'en', country: str = 'US') -> pd.DataFrame:
+        """Async version of `get_category_news`."""
+        results = await self._afetch_feed("topic", language, country, category)
+        return self._feed_to_df(results)
 
     def get_category_news(self, category: str, language: str = 'en', country: str = 'US') -> List[NewsItem]:
         """
         Gets news from a specific category.
         Categories: 'WORLD', 'NATION', 'BUSINESS', 'TECHNOLOGY', 'ENTERTAINMENT', 'SCIENCE', 'SPORTS', 'HEALTH'
         """
-        gnf = GoogleNewsFeed(language=language, country=country)
-        results = gnf.query_topic(category)
-        return self._news_items_to_df(results)
+        return run_sync(self.aget_category_news(category, language, country))
+
+    async def aget_location_news(self, location: str, language: str = 'en', country: str = 'US', max_results: int = 10) -> pd.DataFrame:
+        """Async version of `get_location_news`."""
+        results = await self._afetch_feed("search", language, country, f'location:"{location}"',
+                                          max_results=max_results)
+        return self._feed_to_df(results)
 
     def get_location_news(self, location: str, language: str = 'en', country: str = 'US', max_results: int = 10) -> List[NewsItem]:
         """
@@ -122,9 +429,49 @@ class GoogleNewsTool():
         Returns:
             List[NewsItem]: A list of news articles related to the specified location.
         """
-        gnf = GoogleNewsFeed(language=language, country=country)
-        results = gnf.query(f'location:"{location}"')
-        return self._news_items_to_df(results[:max_results])
+        return run_sync(self.aget_location_news(location, language, country, max_results))
+
+    async def aget_local_topics(self, location: str, language: str = 'en', country: str = 'US', num_topics: int = 10) -> Dict[str, Any]:
+        """Async version of `get_local_topics`."""
+        local_news = await self._afetch_feed("search", language, country, f'location:"{location}"')
+        headlines = [(title or "").lower() for title in local_news["title"]]
+        location_words = set(location.lower().split())
+        spikes = None
+
+        if self.track_trends:
+            engine = await self._track_headlines(f"local-{location}-{language}-{country}", local_news["title"],
+                                                 exclude=location_words)
+            topic_frequencies = engine.top(num_topics, exclude=location_words)
+            spikes = dict(engine.spikes(num_topics, exclude=location_words))
+        else:
+            # Extract words from headlines
+            words = [word for headline in headlines for word in headline.split()]
+
+            # Remove common words and location name
+            stop_words = set(['the', 'best', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'but', 'is', 'are', 'was', 'were'])
+            stop_words.update(location_words)
+            words = [word for word in words if word not in stop_words and len(word) > 2]
+
+            # Count word frequency and get top N most common words as local topics
+            topic_frequencies = Counter(words).most_common(num_topics)
+        local_topics = [topic for topic, _ in topic_frequencies]
+
+        # Get sample headlines for top topics
+        sample_headlines = []
+        for topic in local_topics[:5]:  # Get samples for top 5 topics
+            for headline in headlines:
+                if topic in headline and headline not in sample_headlines:
+                    sample_headlines.append(headline)
+                    break
+
+        result = {
+            'topics': local_topics,
+            'topic_frequencies': dict(topic_frequencies),
+            'sample_headlines': sample_headlines
+        }
+        if spikes is not None:
+            result['spikes'] = spikes
+        return result
 
     def get_local_topics(self, location: str, language: str = 'en', country: str = 'US', num_topics: int = 10) -> Dict[str, Any]:
         """
@@ -141,40 +488,29 @@ class GoogleNewsTool():
                 - 'topics': List of trending local topics
                 - 'topic_frequencies': Dictionary of topic frequencies
                 - 'sample_headlines': List of sample headlines for the top topics
+                - 'spikes': Topics mentioned far more than usual, with how many times more (when tracking trends)
         """
-        gnf = GoogleNewsFeed(language=language, country=country)
-        local_news = gnf.query(f'location:"{location}"')
+        return run_sync(self.aget_local_topics(location, language, country, num_topics))
+
+    async def aget_trending_topics(self, language: str = 'en', country: str = 'US', num_topics: int = 10) -> List[str]:
+        """Async version of `get_trending_topics`."""
+        headlines = await self._afetch_feed("headlines", language, country)
+        if self.track_trends:
+            engine = await self._track_headlines(f"headlines-{language}-{country}", headlines["title"])
+            return [topic for topic, _ in engine.top(num_topics)]
 
         # Extract words from headlines
-        words = []
-        headlines = []
-        for article in local_news:
-            headline = article.title.lower()
-            headlines.append(headline)
-            words.extend(headline.split())
-
-        # Remove common words and location name
-        stop_words = set(['the', 'best', 'a', 'an', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'but', 'is', 'are', 'was', 'were'])
-        stop_words.update(location.lower().split())
+        words = ' '.join([title or "" for title in headlines["title"]]).lower().split()
+
+        # Remove common words (you might want to expand this list)
+        stop_words = set(['the', 'a', 'an', 'best', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'but'])
         words = [word for word in words if word not in stop_words and len(word) > 2]
 
-        # Count word frequency and get top N most common words as local topics
+        # Count word frequency and get top N most common words as trending topics
         word_counts = Counter(words)
-        local_topics = [word for word, _ in word_counts.most_common(num_topics)]
-
-        # Get sample headlines for top topics
-        sample_headlines = []
-        for topic in local_topics[:5]:  # Get samples for top 5 topics
-            for headline in headlines:
-                if topic in headline and headline not in sample_headlines:
-                    sample_headlines.append(headline)
-                    break
+        trending_topics = [word for word, _ in word_counts.most_common(num_topics)]
 
-        return {
-            'topics': local_topics,
-            'topic_frequencies': {topic: count for topic, count in word_counts.most_common(num_topics)},
-            'sample_headlines': sample_headlines
-        }
+        return trending_topics
 
     def get_trending_topics(self, language: str = 'en', country: str = 'US', num_topics: int = 10) -> List[str]:
         """
@@ -192,21 +528,30 @@ class GoogleNewsTool():
         Returns:
             List[str]: A list of trending topics.
         """
-        gnf = GoogleNewsFeed(language=language, country=country)
-        headlines = gnf.top_headlines()
-
-        # Extract words from headlines
-        words = ' '.join([article.title for article in headlines]).lower().split()
+        return run_sync(self.aget_trending_topics(language, country, num_topics))
 
-        # Remove common words (you might want to expand this list)
-        stop_words = set(['the', 'a', 'an', 'best', 'in', 'on', 'at', 'to', 'for', 'of', 'and', 'or', 'but'])
-        words = [word for word in words if word not in stop_words and len(word) > 2]
+    def search_news_archive(self, query: str = None, after: date = None, before: date = None,
+                            source: str = None, max_results: int = 50) -> pd.DataFrame | str:
+        """
+        Searches the news items collected so far, offline (needs the tool to be created with archive_news=True).
 
-        # Count word frequency and get top N most common words as trending topics
-        word_counts = Counter(words)
-        trending_topics = [word for word, _ in word_counts.most_common(num_topics)]
+        Args:
+            query (str, optional): Words that must all appear in the title, description or article text.
+            after (date, optional): Earliest publication date, format YYYY-MM-DD.
+            before (date, optional): Publication date before which to stop, format YYYY-MM-DD.
+            source (str, optional): Only items from this news source.
+            max_results (int): The maximum number of items to return.
 
-        return trending_topics
+        Returns:
+            A DataFrame where each row is a news item, best matches first (newest first without a query).
+        """
+        if self.archive is None:
+            return "Error: the news archive is not enabled, create the tool with archive_news=True"
+        if isinstance(after, str):
+            after = date.fromisoformat(after)
+        if isinstance(before, str):
+            before = date.fromisoformat(before)
+        return self.archive.search(query, after=after, before=before, source=source, max_results=max_results)
 
     def explain_search_syntax(self) -> str:
         """Provides an explanation of the advanced search syntax."""
@@ -232,20 +577,115 @@ class GoogleNewsTool():
         """
         return explanation
 
-    async def download_news_article(self, title:str, url: str) -> str:
-        """ Resolves internal Google News links to the actual news article links. """
+    async def decode_news_links(self, urls: List[str]) -> Dict[str, str | None]:
+        """ Resolves Google News article links to the publisher's article URLs, all at once.
+        Links that could not be resolved map to None. """
+        results = await self.link_decoder.decode_many(urls)
+        return {url: result["decoded_url"] if result.get("status") else None for url, result in results.items()}
+
+    async def download_news_articles(self, articles: pd.DataFrame | List[tuple], max_chars: int = 20000,
+                                     summarize: bool = False, max_concurrency: int = 8,
+                                     skip_duplicates: bool = True) -> Dict[Any, str]:
+        """ Downloads the articles of a news result at once: links are resolved, pages downloaded and
+        converted in one pipeline, and `max_chars` is shared between all articles.
+
+        Args:
+            articles: A DataFrame from one of the news methods, or a list of (title, link) pairs.
+            max_chars (int): Characters of text for all articles together.
+            summarize (bool): Cut long articles down to their sentences most relevant to the title
+                instead of truncating them.
+            max_concurrency (int): The most articles downloaded at the same time.
+            skip_duplicates (bool): Don't download articles whose title is a near-duplicate of an earlier
+                row, and don't repeat articles whose text turns out to be a near-duplicate.
+
+        Returns:
+            The text of each article keyed by its DataFrame index (or position in the list).
+        """
+        if isinstance(articles, pd.DataFrame):
+            rows = list(zip(articles.index, articles["title"], articles["link"]))
+        else:
+            rows = [(i, title, link) for i, (title, link) in enumerate(articles)]
+        first_row = {}
+        for key, _, link in rows:
+            first_row.setdefault(link, key)
+        # Row key of the earlier row each duplicate row repeats: same link, or near-duplicate title
+        duplicate_of = {}
+        if skip_duplicates and rows:
+            stories = cluster_titles([title for _, title, _ in rows])
+            for i, (key, _, link) in enumerate(rows):
+                if first_row[link] != key:
+                    duplicate_of[key] = first_row[link]
+                elif stories[i] != i:
+                    duplicate_of[key] = rows[stories[i]][0]
+        links = {link: title for key, title, link in rows if key not in duplicate_of}
+        if not links:
+            return {}
+
+        browser = self.browser_tool
+        # Convert somewhat more than an even share, so short articles leave room for long ones
+        page_chars = browser.page_chars(min(max_chars, max(2000, 2 * max_chars // len(links))), summarize)
+        client = get_http_client("web")
+        sem = asyncio.Semaphore(max_concurrency)
+
+        async def fetch(link: str, title: str) -> dict:
+            decoded = await self.link_decoder.decode(link)
+            if not decoded.get("status"):
+                return {"url": link, "title": title, "error": f"Error resolving actual article link: {decoded['message']}"}
+            return await browser.fetch_page(client, decoded["decoded_url"], title, sem,
+                                            page_chars * browser.bytes_per_char, page_chars)
+
+        results = await asyncio.gather(*[fetch(link, title) for link, title in links.items()], return_exceptions=True)
+        # gather returns a CancelledError as a result too, it is not an Exception
+        pages = {
+            link: {"url": link, "title": links[link], "error": str(result) or type(result).__name__}
+            if isinstance(result, BaseException) else result
+            for link, result in zip(links, results)
+        }
+        if self.archive is not None:
+            for link, page in pages.items():
+                if "text" in page:
+                    await asyncio.to_thread(self.archive.save_text, link, page["text"])
+        if skip_duplicates:
+            # Different headlines over the same wire text
+            with_text = [link for link, page in pages.items() if "text" in page]
+            stories = cluster_texts([pages[link]["text"] for link in with_text])
+            for link, story in zip(with_text, stories):
+                if with_text[story] != link:
+                    del pages[link]
+                    duplicate_of[first_row[link]] = first_row[with_text[story]]
+
+        # Shortest articles first, each gets an even share of what the ones before it left
+        budgets = {}
+        remaining = max_chars
+        with_text = sorted((link for link, page in pages.items() if "text" in page), key=lambda link: len(pages[link]["text"]))
+        for i, link in enumerate(with_text):
+            budgets[link] = min(len(pages[link]["text"]), remaining // (len(with_text) - i))
+            remaining -= budgets[link]
+
+        texts = {}
+        for key, title, link in rows:
+            if key in duplicate_of:
+                texts[key] = f"DUPLICATE: {title} repeats the story of row {duplicate_of[key]}"
+                continue
+            page = pages[link]
+            if "text" in page:
+                text = browser.fit_page_text(page["text"], budgets[link], title, summarize)
+                texts[key] = f"PAGE: {title} (url: {page['url']})\n{text}"
+            elif "skipped" in page:
+                texts[key] = browser.skipped_note(page)
+            elif str(page.get("error", "")).startswith("Error"):
+                texts[key] = page["error"]
+            else:
+                texts[key] = f"Error downloading page: {page.get('error', 'no content')}"
+        return texts
+
+    async def download_news_article(self, title:str, url: str, summarize: bool = False) -> str:
+        """ Resolves internal Google News links to the actual news article links.
+        With summarize=True, a long article is cut down to its sentences most relevant to the title. """
 
         try:
-            if 'news.google.com' in url:
-                decoded_url = new_decoderv1(url, interval=1)
-                if decoded_url.get("status"):
-                    url = decoded_url["decoded_url"]
-                else:
-                    return f"Error resolving actual article link: {decoded_url['message']}"
-
-            url_titles = [(url, title)]
-            text_results = await self.browser_tool.convert_downloaded_pages(url_titles, 5000)
-            return "\n".join(text_results)
+            texts = await self.download_news_articles([(title, url)], max_chars=5000, summarize=summarize)
+            return texts[0]
 
         except Exception as e:
             print(f"News page download error occurred: {e}")
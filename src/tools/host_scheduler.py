@@ -0,0 +1,148 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+
+
+# Responses that mean the origin wants us to slow down
+THROTTLE_STATUSES = {429, 503}
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HostLimiter():
+    """Concurrency limit for one host, adjusted by additive-increase/multiplicative-decrease.
+
+    Every successful request grows the limit by 1/limit (about +1 per round of requests),
+    throttling responses, server errors and latency spikes cut it back. The limiter holds
+    only plain numbers, so it can outlive the event loop of any single call.
+    """
+
+    LATENCY_SPIKE_FACTOR = 3.0
+
+    def __init__(self, initial: float = 2, max_limit: float = 8, min_limit: float = 1):
+        self.limit = float(initial)
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.active = 0
+        self.blocked_until = 0.0
+        self.latency_ewma: float | None = None
+        self._waiters: deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.blocked_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            with self._lock:
+                if self.active < int(self.limit):
+                    self.active += 1
+                    return
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    woken = waiter not in self._waiters
+                    if not woken:
+                        self._waiters.remove(waiter)
+                # A wake-up that reached us is passed on, or the next waiter could wait forever
+                if woken:
+                    self._wake()
+                raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+        self._wake()
+
+    def record(self, ok: bool, latency: float | None = None, throttled: bool = False,
+               retry_after: float | None = None) -> None:
+        with self._lock:
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            spike = (
+                ok and latency is not None and self.latency_ewma is not None
+                and latency > self.LATENCY_SPIKE_FACTOR * self.latency_ewma
+            )
+            if ok and latency is not None:
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+
+            if throttled or not ok:
+                self.limit = max(self.min_limit, self.limit / 2)
+            elif spike:
+                self.limit = max(self.min_limit, self.limit * 0.75)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        # Woken waiters re-check the limit, so waking one too many is harmless
+        with self._lock:
+            free = int(self.limit) - self.active
+            while free > 0 and self._waiters:
+                waiter = self._waiters.popleft()
+                loop = waiter.get_loop()
+                if waiter.done() or loop.is_closed():
+                    continue
+                loop.call_soon_threadsafe(_set_waiter, waiter)
+                free -= 1
+
+
+def _set_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class HostScheduler():
+    """Per-host adaptive concurrency limits, shared by every download in the process."""
+
+    def __init__(self, per_host_initial: float = 2, per_host_max: float = 8):
+        self.per_host_initial = per_host_initial
+        self.per_host_max = per_host_max
+        self._hosts: dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, host: str) -> HostLimiter:
+        with self._lock:
+            limiter = self._hosts.get(host)
+            if limiter is None:
+                limiter = HostLimiter(self.per_host_initial, self.per_host_max)
+                self._hosts[host] = limiter
+            return limiter
+
+    @asynccontextmanager
+    async def slot(self, host: str):
+        limiter = self.limiter(host)
+        await limiter.acquire()
+        try:
+            yield limiter
+        finally:
+            limiter.release()
+
+    def record(self, host: str, status: int | None, latency: float | None = None,
+               retry_after: float | None = None) -> None:
+        """Feeds the outcome of a request back into the host's limit.
+        A `status` of None means the request failed without a response."""
+        ok = status is not None and status < 500 and status not in THROTTLE_STATUSES
+        self.limiter(host).record(ok, latency, throttled=status in THROTTLE_STATUSES, retry_after=retry_after)
+
+    def limits(self) -> dict[str, float]:
+        return {host: limiter.limit for host, limiter in self._hosts.items()}
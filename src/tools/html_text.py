@@ -0,0 +1,268 @@
+import asyncio
+import re
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+
+import html2text
+
+
+# Documents smaller than this are converted inline, handing them to a pool costs more than it saves
+INLINE_CONVERT_BYTES = 20_000
+
+_executors: dict[tuple[str, int | None], Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def html_to_text(html: str, max_chars: int | None = None) -> str:
+    """Converts an HTML document to markdown text, optionally cut to `max_chars`."""
+    text = html2text.html2text(html)
+    return text[0:max_chars] if max_chars is not None else text
+
+
+# Elements whose content is never useful page text
+SKIP_TAGS = {
+    "script", "style", "noscript", "template", "head", "svg", "canvas", "iframe", "object",
+    "nav", "footer", "aside", "button", "select", "dialog",
+}
+SKIP_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "menu"}
+# Whole class names or ids that mark site chrome rather than content. Fragments are not enough:
+# themes put state classes such as 'has-sidebar' or 'comments-open' on the page wrappers.
+BOILERPLATE_RE = re.compile(
+    r"(nav|navbar|navigation|menu|breadcrumbs?|sidebar|footer|site-footer|masthead|cookies?|"
+    r"cookie-(banner|notice|consent)|consent|banner|ads?|advert|advertisement|promo|share|share-buttons|"
+    r"social|social-share|related|related-posts|comments?|newsletter|subscribe|popup|modal)",
+    re.IGNORECASE,
+)
+# Page wrappers, never skipped for their class or id
+WRAPPER_TAGS = {"html", "body", "main", "article"}
+# Block elements that only need a line break, not a paragraph break
+LINE_TAGS = {"br", "li", "tr", "dt", "dd"}
+BLOCK_TAGS = LINE_TAGS | {
+    "p", "div", "section", "article", "main", "header", "hr", "ul", "ol", "dl",
+    "table", "blockquote", "pre", "figure", "figcaption", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+# html.parser doesn't infer omitted end tags, so skipped elements whose end tag is optional
+# also end where the browser would close them: <head> at the first body tag, <p> at a block
+HEAD_TAGS = {"title", "meta", "link", "style", "script", "base", "noscript", "template"}
+P_CLOSING_TAGS = {
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "main", "menu", "nav", "ol", "p", "pre",
+    "section", "table", "ul",
+}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Characters of HTML handed to the parser at a time, the budget is checked between chunks
+FEED_CHUNK_CHARS = 8192
+
+
+class BudgetTextExtractor(HTMLParser):
+    """Incremental HTML-to-text extractor that skips boilerplate and stops at a character budget."""
+
+    def __init__(self, max_chars: int | None = None):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.done = False
+        self._parts: list[str] = []
+        self._used = 0
+        self._skip_tag: str | None = None
+        self._skip_depth = 0
+        self._at_line_start = True
+        self._newlines = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if not self._implies_skip_end(tag):
+                if tag == self._skip_tag:
+                    self._skip_depth += 1
+                return
+            self._skip_tag = None
+        if tag not in VOID_TAGS and self._is_boilerplate(tag, attrs):
+            self._skip_tag = tag
+            self._skip_depth = 1
+            return
+        if tag in BLOCK_TAGS:
+            self._newline(tag in LINE_TAGS)
+        if tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self._write("#" * int(tag[1]) + " ")
+        elif tag == "li":
+            self._write("* ")
+
+    def handle_endtag(self, tag):
+        if self._skip_tag is not None and tag != self._skip_tag and self._implies_skip_end(tag, end=True):
+            self._skip_tag = None
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if self._skip_depth == 0:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._newline(tag in LINE_TAGS)
+
+    def handle_data(self, data):
+        if self._skip_tag is not None or self.done:
+            return
+        text = " ".join(data.split())
+        if not text:
+            if data and not self._at_line_start:
+                self._write(" ")
+            return
+        if data[0].isspace() and not self._at_line_start:
+            text = " " + text
+        if data[-1].isspace():
+            text += " "
+        self._write(text)
+
+    def text(self) -> str:
+        return "".join(self._parts).strip()
+
+    def _implies_skip_end(self, tag: str, end: bool = False) -> bool:
+        """True if `tag` (a start tag, or an end tag with `end`) closes the skipped element
+        although its own end tag was left out."""
+        if self._skip_tag == "head":
+            return not end and tag not in HEAD_TAGS
+        if self._skip_tag == "p":
+            # Inline elements inside the paragraph don't close it, blocks around or after it do
+            return tag in (BLOCK_TAGS if end else P_CLOSING_TAGS)
+        if self._skip_tag == "li" and self._skip_depth == 1:
+            return tag in (("ul", "ol") if end else ("li",))
+        return False
+
+    @staticmethod
+    def _is_boilerplate(tag: str, attrs: list[tuple[str, str | None]]) -> bool:
+        if tag in SKIP_TAGS:
+            return True
+        for name, value in attrs:
+            if not value:
+                continue
+            if name == "role" and value.lower() in SKIP_ROLES:
+                return True
+            if name in ("class", "id") and tag not in WRAPPER_TAGS and any(
+                    BOILERPLATE_RE.fullmatch(token) for token in value.split()):
+                return True
+            if name == "aria-hidden" and value == "true":
+                return True
+        return False
+
+    def _newline(self, single: bool = False):
+        wanted = 1 if single else 2
+        if self._parts and self._newlines < wanted:
+            self._write("\n" * (wanted - self._newlines))
+
+    def _write(self, text: str):
+        if self.done:
+            return
+        if self._at_line_start:
+            text = text.lstrip(" ")
+            if not text:
+                return
+        if self.max_chars is not None:
+            remaining = self.max_chars - self._used
+            if len(text) >= remaining:
+                text = text[0:remaining]
+                self.done = True
+        self._parts.append(text)
+        self._used += len(text)
+        stripped = text.rstrip("\n")
+        self._newlines = len(text) - len(stripped) + (self._newlines if not stripped else 0)
+        self._at_line_start = self._newlines > 0
+
+
+def extract_text(html: str, max_chars: int | None = None) -> str:
+    """Extracts readable text from HTML, stopping as soon as `max_chars` characters are collected."""
+    parser = BudgetTextExtractor(max_chars)
+    for start in range(0, len(html), FEED_CHUNK_CHARS):
+        parser.feed(html[start:start + FEED_CHUNK_CHARS])
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.text()
+
+
+class LinkExtractor(HTMLParser):
+    """Collects the href of every <a> element in document order."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: list[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            href = dict(attrs).get("href")
+            if href:
+                self.links.append(href.strip())
+
+
+def extract_links(html: str) -> list[str]:
+    """Returns the raw href values of the links in an HTML document."""
+    parser = LinkExtractor()
+    parser.feed(html)
+    parser.close()
+    return parser.links
+
+
+# Conversion functions selectable by name, module level so they can run in a process pool
+ENGINES = {
+    "html2text": html_to_text,
+    "incremental": extract_text,
+}
+
+
+def get_executor(kind: str, max_workers: int | None = None) -> Executor:
+    """Returns the shared thread or process pool of the given kind."""
+    with _executors_lock:
+        executor = _executors.get((kind, max_workers))
+        if executor is None:
+            if kind == "process":
+                executor = ProcessPoolExecutor(max_workers=max_workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="html_text")
+            _executors[(kind, max_workers)] = executor
+        return executor
+
+
+def shutdown_executors(wait: bool = True) -> None:
+    """Shuts down all conversion pools. They are recreated on next use."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+class HtmlConverter():
+    """Converts HTML to text without blocking the event loop.
+
+    Large documents are handed to a shared thread or process pool, small ones are
+    converted inline.
+    """
+
+    KINDS = ("thread", "process", "inline")
+
+    def __init__(self, kind: str = "thread", max_workers: int | None = None,
+                 inline_bytes: int = INLINE_CONVERT_BYTES, engine: str = "html2text"):
+        """
+        Args:
+            kind: 'thread', 'process' or 'inline' (always convert on the event loop).
+            max_workers: Pool size, defaults to the executor's own default.
+            inline_bytes: Documents below this size skip the pool.
+            engine: 'html2text' (full markdown conversion) or 'incremental' (budget-aware extractor).
+        """
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown converter kind '{kind}', expected one of {self.KINDS}")
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown text engine '{engine}', expected one of {tuple(ENGINES)}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.inline_bytes = inline_bytes
+        self.engine = engine
+
+    async def convert(self, html: str, max_chars: int | None = None) -> str:
+        convert_fn = ENGINES[self.engine]
+        if self.kind == "inline" or len(html) < self.inline_bytes:
+            return convert_fn(html, max_chars)
+
+        loop = asyncio.get_running_loop()
+        executor = get_executor(self.kind, self.max_workers)
+        return await loop.run_in_executor(executor, convert_fn, html, max_chars)
@@ -0,0 +1,124 @@
+import asyncio
+import importlib.util
+import threading
+from dataclasses import dataclass, field, replace
+
+import httpx
+
+
+@dataclass(frozen=True)
+class UpstreamConfig():
+    """Connection pool settings for one upstream service."""
+    http2: bool = False
+    max_connections: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    timeout: float = 5.0
+    headers: dict = field(default_factory=dict)
+
+
+DEFAULT_UPSTREAMS: dict[str, UpstreamConfig] = {
+    "scaleserp": UpstreamConfig(),
+    "scrapingbee": UpstreamConfig(),
+    "linkedin": UpstreamConfig(),
+    # Google News RSS answers browser-like clients that have accepted the cookie consent
+    "google_news": UpstreamConfig(
+        timeout=10.0,
+        headers={
+            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                          "Chrome/108.0.0.0 Safari/537.36",
+            "Cookie": "CONSENT=YES+cb.20220419-08-p0.cs+FX+111",
+        },
+    ),
+    # Arbitrary web pages: many distinct hosts, so a wider pool
+    "web": UpstreamConfig(max_connections=100, max_keepalive_connections=40),
+}
+
+
+class HttpClientRegistry():
+    """Process-wide registry of pooled `httpx.AsyncClient` instances.
+
+    Each upstream gets its own keep-alive pool. Clients are bound to the event loop
+    that created them, so callers that use `asyncio.run()` per call still get a
+    working client on every new loop and reuse it for the lifetime of that loop.
+    """
+
+    def __init__(self, upstreams: dict[str, UpstreamConfig] | None = None):
+        self._configs: dict[str, UpstreamConfig] = dict(upstreams or DEFAULT_UPSTREAMS)
+        self._clients: dict[tuple[int, str], tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._lock = threading.Lock()
+
+    def get_config(self, upstream: str) -> UpstreamConfig:
+        return self._configs.get(upstream) or UpstreamConfig()
+
+    def configure(self, upstream: str, **options) -> UpstreamConfig:
+        """Update the pool settings for an upstream (e.g. `http2=True`, `max_connections=50`).
+
+        Clients that are already open keep their settings until they are closed.
+        """
+        with self._lock:
+            config = replace(self.get_config(upstream), **options)
+            self._configs[upstream] = config
+        return config
+
+    def get_client(self, upstream: str = "web") -> httpx.AsyncClient:
+        """Returns the shared client for `upstream` on the running event loop."""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), upstream)
+        with self._lock:
+            self._prune_closed_loops()
+            entry = self._clients.get(key)
+            if entry is not None and entry[0] is loop and not entry[1].is_closed:
+                return entry[1]
+            client = self._build_client(upstream, self.get_config(upstream))
+            self._clients[key] = (loop, client)
+        return client
+
+    async def aclose(self, upstream: str | None = None) -> None:
+        """Closes the clients owned by the running event loop (all upstreams by default)."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            closing = [
+                key for key, (owner, _) in self._clients.items()
+                if owner is loop and (upstream is None or key[1] == upstream)
+            ]
+            clients = [self._clients.pop(key)[1] for key in closing]
+        for client in clients:
+            await client.aclose()
+
+    def _prune_closed_loops(self) -> None:
+        # Connections of a closed loop can't be reused or closed any more; just drop them.
+        for key, (owner, client) in list(self._clients.items()):
+            if owner.is_closed() or client.is_closed:
+                del self._clients[key]
+
+    @staticmethod
+    def _build_client(upstream: str, config: UpstreamConfig) -> httpx.AsyncClient:
+        http2 = config.http2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print(f"HTTP/2 requested for '{upstream}' but the 'h2' package is not installed, using HTTP/1.1")
+            http2 = False
+
+        return httpx.AsyncClient(
+            http2=http2,
+            headers=config.headers,
+            timeout=config.timeout,
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+
+
+http_clients = HttpClientRegistry()
+
+
+def get_http_client(upstream: str = "web") -> httpx.AsyncClient:
+    """Returns the process-wide pooled client for `upstream`."""
+    return http_clients.get_client(upstream)
+
+
+async def close_http_clients() -> None:
+    """Closes all pooled clients of the running event loop. Call before the loop shuts down."""
+    await http_clients.aclose()
@@ -4,6 +4,8 @@ from typing import Dict, Callable, ClassVar, Optional
 import httpx
 import pandas as pd
 
+from .http_clients import get_http_client
+
 
 class LinkedinDataTool():
     BASE_URL: ClassVar[str] = "https://linkedin-data-api.p.rapidapi.com"
@@ -52,13 +54,13 @@ class LinkedinDataTool():
 
         params = {"keyword": keyword}
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/search-locations",
-                headers=self.get_headers(),
-                params=params,
-                timeout=30,
-            )
+        client = get_http_client("linkedin")
+        response = await client.get(
+            f"{self.BASE_URL}/search-locations",
+            headers=self.get_headers(),
+            params=params,
+            timeout=30,
+        )
 
         response.raise_for_status()
         results = response.json()
@@ -85,13 +87,13 @@ class LinkedinDataTool():
             "url": profile_url
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/get-profile-data-by-url",
-                headers=self.get_headers(),
-                params=params,
-                timeout=30,
-            )
+        client = get_http_client("linkedin")
+        response = await client.get(
+            f"{self.BASE_URL}/get-profile-data-by-url",
+            headers=self.get_headers(),
+            params=params,
+            timeout=30,
+        )
 
         response.raise_for_status()
         profile_data = response.json()
@@ -118,52 +120,52 @@ class LinkedinDataTool():
             params = {"username": company_username_or_domain}
 
         # Make the API request
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.get(
-                    endpoint,
-                    headers=self.get_headers(),
-                    params=params,
-                    timeout=30,
-                )
-                response.raise_for_status()
-                company_data = response.json()
-
-                # Check if the API request was successful
-                if not company_data.get("success"):
-                    error_message = company_data.get("message", "Unknown error")
-                    return f"Error: {error_message}"
-
-                # Extract data and handle cases where data might be None
-                data = company_data.get("data", {})
-                if data is None:
-                    return "No company data found"
-
-                # Convert data to list format for DataFrame
-                if isinstance(data, dict):
-                    items = [data]  # Single company result
-                elif isinstance(data, list):
-                    items = data    # Multiple company results
-                else:
-                    items = []      # No results
-
-                if not items:
-                    return "No company information found"
-
-                # Convert to DataFrame for consistent output format
-                df = pd.DataFrame(items)
-                return self.get_dataframe_preview(
-                    df,
-                    max_rows=len(df),
-                    name_hint="linkedin_company_info",
-                )
-
-            except httpx.HTTPStatusError as e:
-                return f"Error: API request failed with status code {e.response.status_code}"
-            except httpx.RequestError as e:
-                return f"Error: Failed to make API request - {str(e)}"
-            except Exception as e:
-                return f"Error: Unexpected error occurred - {str(e)}"
+        client = get_http_client("linkedin")
+        try:
+            response = await client.get(
+                endpoint,
+                headers=self.get_headers(),
+                params=params,
+                timeout=30,
+            )
+            response.raise_for_status()
+            company_data = response.json()
+
+            # Check if the API request was successful
+            if not company_data.get("success"):
+                error_message = company_data.get("message", "Unknown error")
+                return f"Error: {error_message}"
+
+            # Extract data and handle cases where data might be None
+            data = company_data.get("data", {})
+            if data is None:
+                return "No company data found"
+
+            # Convert data to list format for DataFrame
+            if isinstance(data, dict):
+                items = [data]  # Single company result
+            elif isinstance(data, list):
+                items = data    # Multiple company results
+            else:
+                items = []      # No results
+
+            if not items:
+                return "No company information found"
+
+            # Convert to DataFrame for consistent output format
+            df = pd.DataFrame(items)
+            return self.get_dataframe_preview(
+                df,
+                max_rows=len(df),
+                name_hint="linkedin_company_info",
+            )
+
+        except httpx.HTTPStatusError as e:
+            return f"Error: API request failed with status code {e.response.status_code}"
+        except httpx.RequestError as e:
+            return f"Error: Failed to make API request - {str(e)}"
+        except Exception as e:
+            return f"Error: Unexpected error occurred - {str(e)}"
 
     async def linkedin_people_search(
         self,
@@ -211,13 +213,13 @@ class LinkedinDataTool():
         if company:
             params["company"] = company
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.BASE_URL}/search-people",
-                headers=self.get_headers(),
-                params=params,
-                timeout=30,
-            )
+        client = get_http_client("linkedin")
+        response = await client.get(
+            f"{self.BASE_URL}/search-people",
+            headers=self.get_headers(),
+            params=params,
+            timeout=30,
+        )
 
         response.raise_for_status()
         search_results = response.json()
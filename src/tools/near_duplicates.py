@@ -0,0 +1,96 @@
+import hashlib
+
+import numpy as np
+
+from .relevance import tokenize
+from .trending import SOURCE_SUFFIX_RE
+
+
+HASH_BITS = 64
+# Texts whose fingerprints differ in at most this many bits are near-duplicates. Headlines are
+# short, so one changed word ("... strikes Japan" / "... strikes Chile") can be as few as 7 bits.
+TITLE_MAX_DISTANCE = 6
+TEXT_MAX_DISTANCE = 6
+BIT_SHIFTS = np.arange(HASH_BITS, dtype=np.uint64)
+
+
+def title_features(title: str) -> list[str]:
+    """Character 4-grams over the title's sorted words. Outlets reword wire headlines mostly by
+    reordering and small edits, which barely change these."""
+    text = " ".join(sorted(set(tokenize(SOURCE_SUFFIX_RE.sub("", title or "")))))
+    return [text[i:i + 4] for i in range(max(1, len(text) - 3))]
+
+
+def text_features(text: str) -> list[str]:
+    """Word 3-shingles of an article text."""
+    words = tokenize(text or "")
+    return [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+
+
+def simhash(features: list[str]) -> int:
+    """64-bit SimHash: each bit is the majority vote of that bit over the feature hashes."""
+    if not features:
+        return 0
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big") for feature in features],
+        dtype=np.uint64,
+    )
+    bits = (hashes[:, None] >> BIT_SHIFTS) & np.uint64(1)
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    return int(np.sum(np.left_shift(np.uint64(1), BIT_SHIFTS[votes > 0]), dtype=np.uint64))
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class SimHashIndex():
+    """Finds stored fingerprints within `max_distance` bits of a new one.
+
+    The 64 bits are cut into `max_distance + 1` bands. Two fingerprints that differ in at
+    most `max_distance` bits must agree exactly on at least one band, so only fingerprints
+    sharing a band are compared.
+    """
+
+    def __init__(self, max_distance: int = TITLE_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.bands = max_distance + 1
+        self.band_bits = -(-HASH_BITS // self.bands)
+        self.fingerprints: dict[object, int] = {}
+        self._buckets: list[dict[int, list]] = [{} for _ in range(self.bands)]
+
+    def _band_values(self, fingerprint: int) -> list[int]:
+        mask = (1 << self.band_bits) - 1
+        return [(fingerprint >> (band * self.band_bits)) & mask for band in range(self.bands)]
+
+    def add(self, key, fingerprint: int) -> None:
+        self.fingerprints[key] = fingerprint
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._buckets[band].setdefault(value, []).append(key)
+
+    def query(self, fingerprint: int) -> list:
+        """Keys of the stored fingerprints within `max_distance`, closest first."""
+        candidates = set()
+        for band, value in enumerate(self._band_values(fingerprint)):
+            candidates.update(self._buckets[band].get(value, ()))
+        matches = [(hamming(fingerprint, self.fingerprints[key]), key) for key in candidates]
+        return [key for distance, key in sorted(matches, key=lambda match: match[0]) if distance <= self.max_distance]
+
+
+def cluster_duplicates(fingerprints: list[int], max_distance: int) -> list[int]:
+    """Cluster number of each fingerprint: the position of the first fingerprint it is a near-duplicate of."""
+    index = SimHashIndex(max_distance)
+    clusters = []
+    for i, fingerprint in enumerate(fingerprints):
+        matches = index.query(fingerprint)
+        clusters.append(clusters[matches[0]] if matches else i)
+        index.add(i, fingerprint)
+    return clusters
+
+
+def cluster_titles(titles: list[str], max_distance: int = TITLE_MAX_DISTANCE) -> list[int]:
+    return cluster_duplicates([simhash(title_features(title)) for title in titles], max_distance)
+
+
+def cluster_texts(texts: list[str], max_distance: int = TEXT_MAX_DISTANCE) -> list[int]:
+    return cluster_duplicates([simhash(text_features(text)) for text in texts], max_distance)
@@ -0,0 +1,154 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, time as day_time, timezone
+from pathlib import Path
+
+import pandas as pd
+
+from .news_frame import news_frame, parse_pub_dates
+from .page_cache import cache_dir
+from .relevance import TOKEN_RE
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    guid TEXT UNIQUE,
+    link TEXT UNIQUE,
+    title TEXT,
+    source TEXT,
+    published REAL,
+    description TEXT,
+    text TEXT,
+    first_seen REAL
+);
+CREATE INDEX IF NOT EXISTS items_published ON items(published);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+    title, description, text, content='items', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS items_insert AFTER INSERT ON items BEGIN
+    INSERT INTO items_fts(rowid, title, description, text) VALUES (new.id, new.title, new.description, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS items_update AFTER UPDATE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, text)
+        VALUES ('delete', old.id, old.title, old.description, old.text);
+    INSERT INTO items_fts(rowid, title, description, text) VALUES (new.id, new.title, new.description, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS items_delete AFTER DELETE ON items BEGIN
+    INSERT INTO items_fts(items_fts, rowid, title, description, text)
+        VALUES ('delete', old.id, old.title, old.description, old.text);
+END;
+"""
+
+
+def fts_query(query: str) -> str:
+    """FTS5 query matching all the words of `query`, with FTS syntax characters taken literally."""
+    return " ".join(f'"{word}"' for word in TOKEN_RE.findall(query))
+
+
+def day_start(day: date) -> float:
+    return datetime.combine(day, day_time.min, tzinfo=timezone.utc).timestamp()
+
+
+class NewsArchive():
+    """Local archive of the news items the tool has seen, searchable offline.
+
+    Items are stored in SQLite, deduplicated by GUID and by link, with an FTS5 index over
+    title, description and (once downloaded) article text.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        if path is not None:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            if path is not None:
+                self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> "NewsArchive":
+        """Archive under $TOOLS_CACHE_DIR/news_archive, or an in-memory one without that variable."""
+        directory = cache_dir("news_archive")
+        return cls(directory / "news.sqlite" if directory else None)
+
+    def save(self, columns: dict[str, list]) -> int:
+        """Stores the items of a feed (column lists, see `RssColumnParser`) and returns how many were new."""
+        count = len(columns.get("link", []))
+        if count == 0:
+            return 0
+        published = parse_pub_dates(columns.get("pubDate", [None] * count))
+        now = time.time()
+        rows = [
+            (
+                columns.get("guid", [None] * count)[i] or None,
+                columns["link"][i],
+                columns.get("title", [None] * count)[i],
+                columns.get("source", [None] * count)[i],
+                None if pd.isna(published.iat[i]) else published.iat[i].timestamp(),
+                columns.get("description", [None] * count)[i],
+                now,
+            )
+            for i in range(count)
+        ]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                "INSERT OR IGNORE INTO items (guid, link, title, source, published, description, first_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self._db.total_changes - before
+
+    def save_text(self, link: str, text: str) -> bool:
+        """Adds the downloaded article text to the item with `link`."""
+        with self._lock, self._db:
+            return self._db.execute("UPDATE items SET text = ? WHERE link = ?", (text, link)).rowcount > 0
+
+    def search(self, query: str | None = None, after: date | None = None, before: date | None = None,
+               source: str | None = None, max_results: int = 50) -> pd.DataFrame:
+        """Items matching all the words of `query`, best match first (newest first without a query),
+        published on or after `after` and before `before`."""
+        conditions = []
+        params: list = []
+        if after is not None:
+            conditions.append("items.published >= ?")
+            params.append(day_start(after))
+        if before is not None:
+            conditions.append("items.published < ?")
+            params.append(day_start(before))
+        if source:
+            conditions.append("items.source = ?")
+            params.append(source)
+
+        match = fts_query(query or "")
+        if match:
+            sql = ("SELECT items.title, items.link, items.published, items.description, items.source, items.text "
+                   "FROM items_fts JOIN items ON items.id = items_fts.rowid WHERE items_fts MATCH ?")
+            params.insert(0, match)
+            order = "bm25(items_fts)"
+        else:
+            sql = "SELECT title, link, published, description, source, text FROM items WHERE 1"
+            order = "items.published DESC"
+        sql += "".join(f" AND {condition}" for condition in conditions) + f" ORDER BY {order} LIMIT ?"
+        params.append(max_results)
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        columns = {"title": [], "link": [], "pubDate": [], "description": [], "source": [], "text": []}
+        for row in rows:
+            for name, value in zip(columns, row):
+                columns[name].append(value)
+        columns["pubDate"] = [
+            None if published is None else datetime.fromtimestamp(published, tz=timezone.utc)
+            for published in columns["pubDate"]
+        ]
+        return news_frame(columns)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM items").fetchone()[0]
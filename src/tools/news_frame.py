@@ -0,0 +1,69 @@
+import importlib.util
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Iterable
+
+import pandas as pd
+
+from google_news_feed import NewsItem
+
+
+NEWS_COLUMNS = ["title", "link", "pubDate", "description", "source"]
+# Columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = {"source", "query", "language", "country"}
+# pubDate as Google News writes it, e.g. 'Wed, 01 May 2024 12:00:00 GMT'
+RFC822_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+
+
+def news_items_to_columns(news_items: Iterable[NewsItem]) -> dict[str, list]:
+    columns: dict[str, list] = {name: [] for name in NEWS_COLUMNS}
+    for item in news_items:
+        for name in NEWS_COLUMNS:
+            columns[name].append(getattr(item, name))
+    return columns
+
+
+def parse_pub_dates(values: list) -> pd.Series:
+    """Parses RFC-822 date strings (or datetimes) into a UTC datetime64 column.
+
+    Strings are parsed with a fixed format, which is vectorized, and only the values that
+    don't match it (other time zone notations) go through the email date parser.
+    """
+    if not any(isinstance(value, str) for value in values):
+        return pd.Series(pd.to_datetime(values, utc=True), dtype="datetime64[ns, UTC]")
+
+    strings = pd.Series([value if isinstance(value, str) else None for value in values], dtype=object)
+    dates = pd.to_datetime(strings, format=RFC822_FORMAT, utc=True, errors="coerce").astype("datetime64[ns, UTC]")
+    for i in dates.index[dates.isna()]:
+        value = values[i]
+        try:
+            timestamp = pd.Timestamp(value if isinstance(value, datetime) else parsedate_to_datetime(value))
+        except (TypeError, ValueError):
+            continue
+        dates.iat[i] = timestamp.tz_localize("UTC") if timestamp.tzinfo is None else timestamp.tz_convert("UTC")
+    return dates
+
+
+def news_frame(columns: dict[str, list], arrow: bool = False) -> pd.DataFrame:
+    """Builds the news DataFrame from column lists, see `news_items_to_columns`.
+
+    pubDate becomes a UTC datetime64 column and low-cardinality columns become categoricals.
+    With `arrow`, columns are backed by pyarrow when it is installed.
+    """
+    data = {}
+    for name, values in columns.items():
+        if name == "pubDate":
+            data[name] = parse_pub_dates(values)
+        elif name in CATEGORY_COLUMNS:
+            data[name] = pd.Categorical(values)
+        else:
+            data[name] = pd.Series(values, dtype=object)
+    df = pd.DataFrame(data)
+
+    if arrow:
+        if importlib.util.find_spec("pyarrow") is None:
+            print("Arrow output requested but the 'pyarrow' package is not installed (install the 'arrow' extra), "
+                  "using NumPy dtypes")
+        else:
+            df = df.convert_dtypes(dtype_backend="pyarrow")
+    return df
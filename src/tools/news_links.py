@@ -0,0 +1,107 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+from googlenewsdecoder import new_decoderv1
+
+from .page_cache import cache_dir
+
+
+def is_google_news_link(url: str) -> bool:
+    return "news.google.com" in url
+
+
+class DecodeCache():
+    """Persistent mapping from encoded Google News links to the article URLs they stand for.
+
+    Stored in SQLite at `path`, or in memory when no path is given. Decoded links never
+    change, so entries do not expire.
+    """
+
+    def __init__(self, path: str | Path | None = None):
+        if path is not None:
+            path = Path(path).expanduser()
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._db = sqlite3.connect(str(path) if path else ":memory:", check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS links (encoded TEXT PRIMARY KEY, decoded TEXT NOT NULL, decoded_at REAL)"
+            )
+
+    @classmethod
+    def from_env(cls) -> "DecodeCache":
+        directory = cache_dir("news_links")
+        return cls(directory / "decoded.sqlite" if directory else None)
+
+    def get(self, encoded: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT decoded FROM links WHERE encoded = ?", (encoded,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, encoded: str, decoded: str) -> None:
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO links VALUES (?, ?, ?)", (encoded, decoded, time.time()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM links").fetchone()[0]
+
+
+class GoogleNewsLinkDecoder():
+    """Resolves news.google.com article links to the publisher's URL.
+
+    `new_decoderv1` makes blocking requests, so decodes run on a small thread pool of
+    `max_workers`, which also bounds how hard Google is hit, whatever the number of event
+    loops or callers. A link being decoded is shared by everyone asking for it, and
+    decoded links are kept in a `DecodeCache`.
+    """
+
+    def __init__(self, max_workers: int = 4, interval: float | None = None, cache: DecodeCache | None = None):
+        self.interval = interval
+        self.cache = cache if cache is not None else DecodeCache.from_env()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="news-decoder")
+        self._pending: dict[str, Future] = {}
+        # Reentrant, as the done callback runs right away for a future that has already finished
+        self._lock = threading.RLock()
+
+    async def decode(self, url: str) -> dict:
+        """Returns `{'status': True, 'decoded_url': ...}` or `{'status': False, 'message': ...}`,
+        like `new_decoderv1`. Links that are not Google News links are returned as they are."""
+        if not is_google_news_link(url):
+            return {"status": True, "decoded_url": url}
+        decoded = self.cache.get(url)
+        if decoded is not None:
+            return {"status": True, "decoded_url": decoded}
+
+        with self._lock:
+            future = self._pending.get(url)
+            if future is None:
+                future = self._executor.submit(self._decode_blocking, url)
+                self._pending[url] = future
+                future.add_done_callback(lambda _: self._forget(url))
+        # Shielded, so a caller that is cancelled does not cancel the decode the others wait for
+        return await asyncio.shield(asyncio.wrap_future(future))
+
+    async def decode_many(self, urls: list[str]) -> dict[str, dict]:
+        """Decodes all `urls` concurrently, see `decode`."""
+        unique = list(dict.fromkeys(urls))
+        results = await asyncio.gather(*[self.decode(url) for url in unique])
+        return dict(zip(unique, results))
+
+    def _decode_blocking(self, url: str) -> dict:
+        try:
+            result = new_decoderv1(url, interval=self.interval)
+        except Exception as e:
+            return {"status": False, "message": str(e)}
+        if result.get("status"):
+            self.cache.put(url, result["decoded_url"])
+        return result
+
+    def _forget(self, url: str) -> None:
+        with self._lock:
+            self._pending.pop(url, None)
@@ -0,0 +1,255 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"}
+# Eviction frees space down to this fraction of max_bytes, so it doesn't run again on the next write
+EVICT_TO_FRACTION = 0.9
+
+
+def cache_dir(name: str) -> Path | None:
+    """Directory for the named persistent cache, or None when TOOLS_CACHE_DIR is not set."""
+    root = os.environ.get("TOOLS_CACHE_DIR")
+    if not root:
+        return None
+    return Path(root).expanduser() / name
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL used as the cache key.
+
+    Lowercases scheme and host, drops default ports, fragments and tracking parameters,
+    and sorts the query string.
+    """
+    if not url.startswith("http"):
+        url = "https://" + url
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class PageCache():
+    """Persistent, content-addressed cache of downloaded pages.
+
+    Each entry is keyed by the SHA-256 of the normalized URL and stored as a small JSON
+    metadata file (validators, timestamps, extracted texts) next to the gzip-compressed
+    body. Entries older than `max_age` are revalidated with If-None-Match /
+    If-Modified-Since, and the least recently used entries are evicted once the cache
+    grows past `max_bytes`. The size of every entry is indexed on the first write, so the
+    directory is only scanned again when an eviction is due.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 200_000_000, max_age: float = 24 * 3600):
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # Bytes of each entry by metadata path, and their total; None until the first write
+        self._sizes: dict[Path, int] | None = None
+        self._total = 0
+
+    @classmethod
+    def from_env(cls) -> "PageCache | None":
+        """The cache under $TOOLS_CACHE_DIR/pages, or None when no cache directory is configured."""
+        directory = cache_dir("pages")
+        return cls(directory) if directory is not None else None
+
+    def get(self, url: str) -> dict | None:
+        """Returns the cached entry for `url` (metadata plus 'body'), or None."""
+        meta = self._read_meta(url)
+        if meta is None:
+            return None
+        try:
+            with gzip.open(self._body_path(url), "rt", encoding="utf-8") as f:
+                meta["body"] = f.read()
+        except (OSError, EOFError):
+            return None
+        self._touch(url)
+        return meta
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry.get("stored_at", 0) < self.max_age
+
+    @staticmethod
+    def covers(entry: dict, max_bytes: int | None) -> bool:
+        """True if the cached body holds at least the first `max_bytes` of the page."""
+        if not entry.get("truncated"):
+            return True
+        return max_bytes is not None and (entry.get("byte_limit") or 0) >= max_bytes
+
+    @staticmethod
+    def validators(entry: dict) -> dict:
+        """Conditional request headers for revalidating `entry`."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url: str, body: str, etag: str | None = None, last_modified: str | None = None,
+            truncated: bool = False, byte_limit: int | None = None, kind: str = "html") -> None:
+        meta = {
+            "url": normalize_url(url),
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "truncated": truncated,
+            "byte_limit": byte_limit,
+            "kind": kind,
+            "texts": {},
+        }
+        with self._lock:
+            body_path = self._body_path(url)
+            body_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = body_path.with_suffix(".gz.tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                f.write(body)
+            os.replace(tmp_path, body_path)
+            self._write_meta(url, meta)
+            over_limit = self._record(url)
+        if over_limit:
+            self.evict()
+
+    def revalidated(self, url: str, etag: str | None = None, last_modified: str | None = None) -> None:
+        """Marks the entry as fresh again after a 304 Not Modified."""
+        with self._lock:
+            meta = self._read_meta(url)
+            if meta is not None:
+                meta["stored_at"] = time.time()
+                meta["etag"] = etag or meta.get("etag")
+                meta["last_modified"] = last_modified or meta.get("last_modified")
+                self._write_meta(url, meta)
+                self._record(url)
+
+    def get_text(self, url: str, engine: str, max_chars: int) -> str | None:
+        """Previously extracted text for `url`, if it is fresh and long enough for `max_chars`."""
+        meta = self._read_meta(url)
+        if meta is None or not self.is_fresh(meta):
+            return None
+        cached = meta.get("texts", {}).get(engine)
+        if cached is None:
+            return None
+        text = cached["text"]
+        # A text shorter than its own budget is the complete page, so it satisfies any budget
+        if cached["max_chars"] < max_chars and len(text) >= cached["max_chars"]:
+            return None
+        self._touch(url)
+        return text[0:max_chars]
+
+    def peek_text(self, url: str, engine: str) -> str | None:
+        """Whatever fresh text is cached for `url`, regardless of the budget it was extracted for."""
+        meta = self._read_meta(url)
+        if meta is None or not self.is_fresh(meta):
+            return None
+        cached = meta.get("texts", {}).get(engine)
+        return cached["text"] if cached is not None else None
+
+    def put_text(self, url: str, engine: str, max_chars: int, text: str) -> None:
+        with self._lock:
+            meta = self._read_meta(url)
+            if meta is None:
+                return
+            cached = meta["texts"].get(engine)
+            if cached is None or cached["max_chars"] < max_chars:
+                meta["texts"][engine] = {"max_chars": max_chars, "text": text}
+                self._write_meta(url, meta)
+                self._record(url)
+
+    def size(self) -> int:
+        """Bytes used by the cache, as indexed."""
+        with self._lock:
+            if self._sizes is None:
+                self._scan()
+            return self._total
+
+    def evict(self) -> None:
+        """Removes least recently used entries until the cache fits in `max_bytes` (with some room to spare)."""
+        with self._lock:
+            entries = self._scan()
+            if self._total <= self.max_bytes:
+                return
+            target = self.max_bytes * EVICT_TO_FRACTION
+            for _, size, meta_path, body_path in sorted(entries):
+                meta_path.unlink(missing_ok=True)
+                body_path.unlink(missing_ok=True)
+                del self._sizes[meta_path]
+                self._total -= size
+                if self._total <= target:
+                    break
+
+    def _scan(self) -> list[tuple[float, int, Path, Path]]:
+        """Rebuilds the size index from the directory, returns (last use, size, meta path, body path) per entry."""
+        entries = []
+        self._sizes = {}
+        self._total = 0
+        for meta_path in self.directory.glob("*/*.json"):
+            body_path = meta_path.with_suffix(".gz")
+            try:
+                meta_stat = meta_path.stat()
+                size = meta_stat.st_size + body_path.stat().st_size
+            except OSError:
+                continue
+            entries.append((meta_stat.st_mtime, size, meta_path, body_path))
+            self._sizes[meta_path] = size
+            self._total += size
+        return entries
+
+    def _record(self, url: str) -> bool:
+        """Updates the size index after writing the entry for `url`, True when the cache is over `max_bytes`.
+        Call with the lock held."""
+        if self._sizes is None:
+            self._scan()
+            return self._total > self.max_bytes
+        meta_path = self._meta_path(url)
+        try:
+            size = meta_path.stat().st_size + meta_path.with_suffix(".gz").stat().st_size
+        except OSError:
+            size = 0
+        self._total += size - self._sizes.get(meta_path, 0)
+        self._sizes[meta_path] = size
+        return self._total > self.max_bytes
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+    def _meta_path(self, url: str) -> Path:
+        key = self._key(url)
+        return self.directory / key[0:2] / f"{key}.json"
+
+    def _body_path(self, url: str) -> Path:
+        return self._meta_path(url).with_suffix(".gz")
+
+    def _read_meta(self, url: str) -> dict | None:
+        try:
+            return json.loads(self._meta_path(url).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def _write_meta(self, url: str, meta: dict) -> None:
+        path = self._meta_path(url)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def _touch(self, url: str) -> None:
+        # The metadata file's mtime is the entry's last use, for LRU eviction
+        try:
+            os.utime(self._meta_path(url))
+        except OSError:
+            pass
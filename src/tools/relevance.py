@@ -0,0 +1,82 @@
+import math
+import re
+from collections import Counter
+
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Search operators and excluded terms that should not count as query words. An exclusion
+# starts a token, a hyphen inside a word (e-commerce, covid-19) is part of the word.
+OPERATOR_RE = re.compile(r"(\b\w+:\S*|(?:(?<=\s)|^)-(?:\"[^\"]*\"|\S+))")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "who",
+    "why", "with", "vs",
+}
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOP_WORDS]
+
+
+def query_terms(query: str) -> list[str]:
+    """The distinct words of a search query, without operators like site: or -excluded."""
+    return list(dict.fromkeys(tokenize(OPERATOR_RE.sub(" ", query))))
+
+
+def bm25_scores(terms: list[str], documents: list[list[str]], k1: float = 1.5, b: float = 0.75) -> list[float]:
+    """Okapi BM25 score of each tokenized document for the query `terms`."""
+    if not documents:
+        return []
+    avg_length = sum(len(doc) for doc in documents) / len(documents) or 1.0
+    document_frequency = Counter(term for doc in documents for term in set(doc))
+    scores = []
+    for doc in documents:
+        counts = Counter(doc)
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf == 0:
+                continue
+            idf = math.log(1 + (len(documents) - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+        scores.append(score)
+    return scores
+
+
+def select_results(query: str, results: list[tuple], max_pages: int = 4, min_pages: int = 1,
+                   page_texts: dict[str, str] | None = None) -> list[tuple]:
+    """Picks the smallest, most relevant set of search results that covers the query.
+
+    `results` are (url, title[, snippet]) tuples in search engine order. Each is scored with
+    BM25 over its title, snippet and, when known, its previously extracted page text. Results
+    are then chosen greedily by the query words they add, until every query word found in any
+    result is covered or `max_pages` are chosen.
+    """
+    terms = query_terms(query)
+    if len(results) <= min_pages or not terms:
+        return results[0:max_pages]
+
+    page_texts = page_texts or {}
+    documents = [
+        tokenize(" ".join(str(part) for part in result[1:]) + " " + page_texts.get(result[0], ""))
+        for result in results
+    ]
+    scores = bm25_scores(terms, documents)
+    vocabularies = [set(doc) for doc in documents]
+
+    weights = {term: math.log(1 + len(results) / (1 + sum(term in vocab for vocab in vocabularies))) for term in terms}
+    coverable = {term for term in terms if any(term in vocab for vocab in vocabularies)}
+    covered: set[str] = set()
+    chosen: list[int] = []
+    while len(chosen) < max_pages and len(chosen) < len(results):
+        if covered >= coverable and len(chosen) >= min_pages:
+            break
+        # Most newly covered query weight first, then BM25, then search engine rank
+        best = max(
+            (i for i in range(len(results)) if i not in chosen),
+            key=lambda i: (sum(weights[t] for t in coverable - covered if t in vocabularies[i]), scores[i], -i),
+        )
+        chosen.append(best)
+        covered.update(coverable & vocabularies[best])
+
+    return [results[i] for i in chosen]
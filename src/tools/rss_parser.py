@@ -0,0 +1,90 @@
+import html
+import re
+from xml.etree.ElementTree import Element, ParseError, XMLPullParser
+
+from .news_frame import NEWS_COLUMNS
+
+
+# The DataFrame columns, plus each item's GUID for deduplication
+RSS_COLUMNS = [*NEWS_COLUMNS, "guid"]
+# Google News item descriptions are an HTML snippet whose first link carries the headline
+DESCRIPTION_LINK_RE = re.compile(r"<a\b[^>]*>(.*?)</a>", re.IGNORECASE | re.DOTALL)
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def description_text(description: str | None) -> str | None:
+    if not description:
+        return description
+    match = DESCRIPTION_LINK_RE.search(description)
+    text = match.group(1) if match else description
+    return html.unescape(TAG_RE.sub("", text)).strip()
+
+
+class RssColumnParser():
+    """Incremental RSS parser that appends each <item> to column lists (see `news_frame`).
+
+    Feed it the body chunk by chunk as it arrives; `feed` returns True once `max_results`
+    items were read, so the caller can stop downloading. Parsed items are removed from the
+    tree, so memory stays flat however long the feed is.
+    """
+
+    def __init__(self, max_results: int | None = None):
+        self.max_results = max_results
+        self.columns: dict[str, list] = {name: [] for name in RSS_COLUMNS}
+        self.done = False
+        self._parser = XMLPullParser(events=("start", "end"))
+        self._channel: Element | None = None
+
+    def __len__(self) -> int:
+        return len(self.columns["title"])
+
+    def feed(self, data: bytes) -> bool:
+        if self.done:
+            return True
+        try:
+            self._parser.feed(data)
+            self._read_events()
+        except ParseError as e:
+            print(f"Stopped reading malformed RSS feed after {len(self)} items: {e}")
+            self.done = True
+        return self.done
+
+    def close(self) -> dict[str, list]:
+        if not self.done:
+            try:
+                self._parser.close()
+                self._read_events()
+            except ParseError as e:
+                print(f"Stopped reading malformed RSS feed after {len(self)} items: {e}")
+        self.done = True
+        return self.columns
+
+    def _read_events(self) -> None:
+        for event, element in self._parser.read_events():
+            if event == "start":
+                if element.tag == "channel":
+                    self._channel = element
+                continue
+            if element.tag != "item":
+                continue
+            self._add_item(element)
+            if self._channel is not None:
+                self._channel.remove(element)
+            if self.max_results is not None and len(self) >= self.max_results:
+                self.done = True
+                return
+
+    def _add_item(self, item: Element) -> None:
+        self.columns["title"].append(item.findtext("title"))
+        self.columns["link"].append((item.findtext("link") or "").strip() or None)
+        self.columns["pubDate"].append(item.findtext("pubDate"))
+        self.columns["description"].append(description_text(item.findtext("description")))
+        self.columns["source"].append(item.findtext("source"))
+        self.columns["guid"].append(item.findtext("guid"))
+
+
+def parse_rss(content: bytes, max_results: int | None = None) -> dict[str, list]:
+    """Parses a whole RSS document into column lists."""
+    parser = RssColumnParser(max_results)
+    parser.feed(content)
+    return parser.close()
@@ -1,12 +1,24 @@
 import asyncio
 import os
 import re
-from typing import Callable
+import time
+from contextlib import aclosing
+from typing import AsyncIterator, Callable, ClassVar
+from urllib.parse import urlsplit
 
-import html2text
 #import requests
 import httpx
 
+from .content_types import SNIFF_BYTES, classify_content, decode_body
+from .crawler import SiteCrawler
+from .host_scheduler import HostScheduler, THROTTLE_STATUSES, parse_retry_after
+from .html_text import HtmlConverter
+from .http_clients import get_http_client
+from .latency import LatencyStats
+from .page_cache import PageCache, normalize_url
+from .relevance import select_results
+from .summarize import summarize_text
+from .ttl_cache import TTLCache
 
 
 class ScaleSerpBrowserTool():
@@ -25,14 +37,90 @@ class ScaleSerpBrowserTool():
     # """,
     #     )
 
+    # Rough number of HTML bytes we need to read to end up with one character of text
+    BYTES_PER_CHAR: ClassVar[int] = 20
+    # Hard ceiling on the body we keep in memory for a single page
+    MAX_PAGE_BYTES: ClassVar[int] = 2_000_000
+    # Pages whose Content-Length is larger than this are not downloaded at all
+    MAX_BODY_BYTES: ClassVar[int] = 10_000_000
+    SERP_LOCATION: ClassVar[str] = "San Francisco, California, United States"
+    # Shared by all instances, so a search made by one agent is reused by the others
+    serp_cache: ClassVar[TTLCache] = TTLCache(ttl=15 * 60, stale_ttl=60 * 60)
+    # Search latencies per provider, used to pick the hedge delay
+    provider_latency: ClassVar[dict[str, LatencyStats]] = {
+        "scaleserp": LatencyStats(),
+        "scrapingbee": LatencyStats(),
+    }
+    # Per-host adaptive concurrency, shared so that no tool instance hammers an origin
+    host_scheduler: ClassVar[HostScheduler] = HostScheduler()
+    # Retries of a throttled page download, and the longest Retry-After we are willing to wait
+    DOWNLOAD_RETRIES: ClassVar[int] = 1
+    MAX_RETRY_AFTER: ClassVar[float] = 20.0
+    # Fewest search results downloaded, in case one of them fails or is short
+    MIN_RESULT_PAGES: ClassVar[int] = 2
+    # Hedge delay used until enough latencies are known, and the bounds it may move within
+    HEDGE_DEFAULT_DELAY: ClassVar[float] = 8.0
+    HEDGE_MIN_DELAY: ClassVar[float] = 1.0
+    HEDGE_MAX_DELAY: ClassVar[float] = 30.0
+    # When summarizing, pages are converted to this many times the text budget before picking sentences
+    SUMMARIZE_EXPANSION: ClassVar[int] = 4
+
+    def __init__(self, stream_downloads: bool = True, bytes_per_char: int | None = None,
+                 max_page_bytes: int | None = None, converter: str = "thread",
+                 converter_workers: int | None = None, text_engine: str = "html2text",
+                 page_cache: PageCache | bool | None = None, hedge_searches: bool = False,
+                 hedge_percentile: float = 0.9, browse_deadline: float | None = 30.0,
+                 preflight_head: bool = False, max_body_bytes: int | None = None,
+                 rerank_results: bool = True):
+        """
+        Args:
+            stream_downloads: Stream page bodies and stop reading once the byte budget is reached.
+            bytes_per_char: Bytes of HTML to read per character of requested text.
+            max_page_bytes: Maximum number of body bytes kept for any one page.
+            converter: Where HTML-to-text conversion runs: 'thread', 'process' or 'inline'.
+            converter_workers: Size of the conversion pool.
+            text_engine: 'html2text' for full markdown conversion, or 'incremental' for the faster
+                extractor that drops boilerplate and stops once the character budget is filled.
+            page_cache: On-disk page cache. Defaults to $TOOLS_CACHE_DIR/pages when that variable
+                is set, pass False to disable caching.
+            hedge_searches: Start a ScrapingBee search when ScaleSerp is slower than usual and use
+                whichever answers first, instead of waiting for a ScaleSerp timeout.
+            hedge_percentile: ScaleSerp latency percentile after which the hedge request starts.
+            browse_deadline: Seconds browse_web_tool waits for pages before answering with the ones
+                it has, None to wait for all of them.
+            preflight_head: Check Content-Type and Content-Length with a HEAD request before each
+                download. Without it the check happens on the GET response headers and first chunk.
+            max_body_bytes: Pages declaring a larger Content-Length are skipped.
+            rerank_results: Choose the search results to download by local BM25 relevance to the
+                query (titles, snippets and cached page text) instead of taking the top four.
+        """
+        self.stream_downloads = stream_downloads
+        self.bytes_per_char = bytes_per_char or self.BYTES_PER_CHAR
+        self.max_page_bytes = max_page_bytes or self.MAX_PAGE_BYTES
+        self.converter = HtmlConverter(converter, max_workers=converter_workers, engine=text_engine)
+        if page_cache is None:
+            page_cache = PageCache.from_env()
+        self.page_cache: PageCache | None = page_cache or None
+        self.hedge_searches = hedge_searches
+        self.hedge_percentile = hedge_percentile
+        self.browse_deadline = browse_deadline
+        self.preflight_head = preflight_head
+        self.max_body_bytes = max_body_bytes or self.MAX_BODY_BYTES
+        self.rerank_results = rerank_results
+
     def get_tools(self) -> list[Callable]:
         return self.wrap_tool_functions([
             self.browse_web_tool,
+            self.browse_web_batch,
             self.download_web_pages,
         ])
 
     @staticmethod
-    async def try_scrapingbee(search: str)  -> list[tuple[str,str]]:
+    def normalize_query(search: str) -> str:
+        return " ".join(search.lower().split())
+
+    @staticmethod
+    async def try_scrapingbee(search: str)  -> list[tuple[str,str,str]]:
         url='https://app.scrapingbee.com/api/v1/store/google'
         params = {
             "api_key": os.environ.get("SCRAPINGBEE_API_KEY"),
@@ -40,25 +128,136 @@ class ScaleSerpBrowserTool():
             "language": "en",
             "nb_results": 8,
         }
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                url,
-                params=params,
-                timeout=90,
-            )
+
+        async def fetch():
+            client = get_http_client("scrapingbee")
+            start = time.monotonic()
+            try:
+                response = await client.get(
+                    url,
+                    params=params,
+                    timeout=90,
+                )
+            finally:
+                ScaleSerpBrowserTool.provider_latency["scrapingbee"].record(time.monotonic() - start)
             results = response.json()
             if 'organic_results' not in results:
                 return []
             else:
                 return [
-                    (serp['url'], serp['title']) for serp in results['organic_results'][0:5]
+                    (serp['url'], serp['title'], serp.get('description', ''))
+                    for serp in results['organic_results'][0:5]
                 ]
 
+        key = ("scrapingbee", ScaleSerpBrowserTool.normalize_query(search), params["language"], params["nb_results"])
+        return await ScaleSerpBrowserTool.serp_cache.get_or_fetch(key, fetch)
+
+    async def search_scaleserp(self, search: str, api_key: str) -> list[tuple[str,str,str]]:
+        """ Returns the (url, title, snippet) of the top ScaleSerp results, cached per normalized query. """
+        params = {
+            "q": search,
+            "location": self.SERP_LOCATION,
+            "timeout": 10000,
+            "num": 8,
+            "api_key": api_key
+        }
+
+        async def fetch():
+            client = get_http_client("scaleserp")
+            start = time.monotonic()
+            try:
+                response = await client.get(
+                    "https://api.scaleserp.com/search",
+                    params=params,
+                    timeout=90,
+                )
+            finally:
+                # Cancelled (hedged) requests are recorded too, as a lower bound of their latency
+                self.provider_latency["scaleserp"].record(time.monotonic() - start)
+            results = response.json()
+
+            if 'organic_results' not in results:
+                return []
+            return [
+                (serp['link'], serp['title'], serp.get('snippet', ''))
+                for serp in results['organic_results'][0:5]
+            ]
+
+        key = ("scaleserp", self.normalize_query(search), params["location"], params["num"])
+        return await self.serp_cache.get_or_fetch(key, fetch)
+
+    def hedge_delay(self) -> float:
+        """ Seconds to wait for ScaleSerp before starting the ScrapingBee hedge request. """
+        delay = self.provider_latency["scaleserp"].percentile(self.hedge_percentile)
+        if delay is None:
+            return self.HEDGE_DEFAULT_DELAY
+        return min(max(delay, self.HEDGE_MIN_DELAY), self.HEDGE_MAX_DELAY)
+
+    async def hedged_search(self, search: str, api_key: str) -> list[tuple[str,str,str]]:
+        """ Searches ScaleSerp, and also ScrapingBee once ScaleSerp runs past its usual latency.
+        Returns the first non-empty answer and cancels the other request. """
+        primary = asyncio.create_task(self.search_scaleserp(search, api_key))
+        pending = {primary}
+        # Cancel whatever is still running on the way out, also when the caller is cancelled during the hedge delay
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge_delay())
+            if primary in done and primary.exception() is None and primary.result():
+                return primary.result()
+            if os.environ.get("SCRAPINGBEE_API_KEY") is None:
+                return await primary
+
+            print("ScaleSerp is slow, hedging with ScrapingBee")
+            backup = asyncio.create_task(ScaleSerpBrowserTool.try_scrapingbee(search))
+            pending = pending | {backup}
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        # Neither provider had an answer, surface ScaleSerp's outcome
+        return await primary
+
+    async def search_urls(self, search: str, api_key: str) -> list[tuple] | None:
+        """ Returns the (url, title, snippet) search results for `search`, or None when ScaleSerp has none. """
+        m = re.match(r"site:([\S]+)", search)
+        if m:
+            return [(m.group(1), "")]
+        try:
+            if self.hedge_searches:
+                serp_urls = await self.hedged_search(search, api_key)
+            else:
+                serp_urls = await self.search_scaleserp(search, api_key)
+            return serp_urls or None
+        except httpx.TimeoutException:
+            # Let's try Scrapingbee
+            print("Timed out! Fallback to ScrapingBee")
+            return await ScaleSerpBrowserTool.try_scrapingbee(search)
+
+    async def select_results(self, search: str, urls: list[tuple], max_pages: int = 4) -> list[tuple]:
+        """ Chooses which search results to download, see `relevance.select_results`. """
+        if not self.rerank_results:
+            return urls[0:max_pages]
+        page_texts = {}
+        if self.page_cache is not None:
+            for url in urls:
+                text = await asyncio.to_thread(self.page_cache.peek_text, url[0], self.converter.engine)
+                if text:
+                    page_texts[url[0]] = text
+        return select_results(search, urls, max_pages=max_pages, min_pages=self.MIN_RESULT_PAGES,
+                              page_texts=page_texts)
+
     async def browse_web_tool(
         self,
         search: str,
+        summarize: bool = False,
     ):
         """ Browses the web using the SCALESERP API and returns full page contents related to the search term.
+        With summarize=True, long pages are cut down to their sentences most relevant to the search
+        instead of being truncated.
         """
         api_key: str|None = os.environ.get("SCALESERP_API_KEY")
         if api_key is None:
@@ -66,94 +265,373 @@ class ScaleSerpBrowserTool():
 
         urls: list[tuple] = []
         if search is not None:
-            m = re.match(r"site:([\S]+)", search)
-            if m:
-                urls.append((m.group(1), ""))
-            else:
-                params = {
-                    "q": search,
-                    "location": "San Francisco, California, United States",
-                    "timeout": 10000,
-                    "num": 8,
-                    "api_key": api_key
-                }
-                try:
-                    async with httpx.AsyncClient() as client:
-                        response = await client.get(
-                            "https://api.scaleserp.com/search",
-                            params=params,
-                            timeout=90,
-                        )
-                        results = response.json()
-
-                        if 'organic_results' not in results:
-                            return "ScaleSerp return no results."
-
-                        for serp in results['organic_results'][0:5]:
-                            urls.append((serp['link'], serp['title']))
-                except httpx.TimeoutException:
-                    # Let's try Scrapingbee
-                    print("Timed out! Fallback to ScrapingBee")
-                    urls.extend(await ScaleSerpBrowserTool.try_scrapingbee(search))
-
-                # FIXME: Download pages in parallel
+            urls = await self.search_urls(search, api_key)
+            if urls is None:
+                return "ScaleSerp return no results."
 
         text_results = [f"search: {search}"]
-        used = len(text_results[-1])
         max_count = 10000 # need to know actual token limit
-        text_results.extend(await self.convert_downloaded_pages(urls[0:4], max_count))
-
-        # FIXME: Download pages in parallel
-        used = len(text_results[-1])
+        urls = await self.select_results(search, urls) if search is not None else urls[0:4]
+        pages = self.iter_converted_pages(urls, max_count, deadline=self.browse_deadline, query=search,
+                                          summarize=summarize)
+        async with aclosing(pages):
+            async for page_text in pages:
+                text_results.append(page_text)
 
         return "\n".join(text_results)
 
-    async def download_web_pages(self, page_urls: list[str] = []) -> str:
-        """ Returns the contents of one or more web pages. Text is extracted from HTML pages. """
-        url_titles = [(url, url[0:40]) for url in page_urls]
-        text_results = await self.convert_downloaded_pages(url_titles, 10000)
-        return "\n".join(text_results)
+    async def browse_web_batch(self, searches: list[str]) -> dict[str, str]:
+        """ Browses the web for several related searches at once. Searches run concurrently, and a page
+        found by more than one search is downloaded only once. Returns the page contents per search.
+        """
+        api_key: str|None = os.environ.get("SCALESERP_API_KEY")
+        if api_key is None:
+            return {search: "Error: no API key available for the SCALE SERP API" for search in searches}
+
+        max_count = 10000 # need to know actual token limit
+        search_results = await asyncio.gather(
+            *[self.search_urls(search, api_key) for search in searches], return_exceptions=True
+        )
+
+        # Each unique page, keyed by its normalized URL, is fetched once for all searches
+        search_pages: dict[str, list[str] | None] = {}
+        unique_pages: dict[str, tuple] = {}
+        for search, urls in zip(searches, search_results):
+            if isinstance(urls, Exception):
+                print(f"Search failed for {search}: {urls}")
+                urls = []
+            if urls is None:
+                search_pages[search] = None
+                continue
+            search_pages[search] = []
+            for url in await self.select_results(search, urls):
+                key = normalize_url(url[0])
+                unique_pages.setdefault(key, url)
+                search_pages[search].append(key)
+
+        client = get_http_client("web")
+        sem = asyncio.Semaphore(10)
+        max_bytes = max_count * self.bytes_per_char
+        tasks = {
+            key: asyncio.create_task(self.fetch_page(client, url[0], url[1], sem, max_bytes, max_count))
+            for key, url in unique_pages.items()
+        }
+        if tasks:
+            _, pending = await asyncio.wait(tasks.values(), timeout=self.browse_deadline)
+            for task in pending:
+                task.cancel()
+        pages = {key: task.result() for key, task in tasks.items() if task.done() and not task.cancelled()}
+
+        results = {}
+        for search, keys in search_pages.items():
+            if keys is None:
+                results[search] = "ScaleSerp return no results."
+                continue
+            text_results = [f"search: {search}"]
+            text_results.extend(self.assemble_page_texts([pages[key] for key in keys if key in pages], max_count))
+            results[search] = "\n".join(text_results)
+        return results
+
+    async def download_web_pages(self, page_urls: list[str] = [], crawl: bool = False, max_depth: int = 1,
+                                 max_pages: int = 10, summarize: bool = False) -> str:
+        """ Returns the contents of one or more web pages. Text is extracted from HTML pages.
+        With crawl=True, also follows links to other pages of the same sites (about, team, pricing, ...)
+        up to `max_depth` links away, fetching at most `max_pages` pages in total.
+        With summarize=True, long pages are cut down to their most central sentences instead of being truncated.
+        """
+        max_count = 10000
+        if not crawl:
+            url_titles = [(url, url[0:40]) for url in page_urls]
+            text_results = await self.convert_downloaded_pages(url_titles, max_count, summarize=summarize)
+            return "\n".join(text_results)
+
+        # Share the budget between the pages, so later pages of the crawl are not cut off entirely
+        page_chars = max(1000, max_count // max(1, max_pages))
+        crawler = SiteCrawler(self, max_depth=max_depth, max_pages=max_pages)
+        pages = await crawler.crawl(page_urls, self.page_chars(page_chars, summarize))
+        return "\n".join(self.assemble_page_texts(pages, max_count, summarize=summarize))
 
-    async def convert_downloaded_pages(self, url_titles: list[tuple], max_count:int) -> list[str]:
+    async def convert_downloaded_pages(self, url_titles: list[tuple], max_count:int, query: str | None = None,
+                                       summarize: bool = False) -> list[str]:
+        max_chars = self.page_chars(max_count, summarize)
+        max_bytes = max_chars * self.bytes_per_char
+        res_dicts = await self.download_pages(url_titles, max_bytes=max_bytes, max_chars=max_chars)
+        return self.assemble_page_texts(res_dicts, max_count, query=query, summarize=summarize)
+
+    def page_chars(self, max_count: int, summarize: bool) -> int:
+        """ Characters of text to convert per page: more than fit when the text is summarized afterwards. """
+        return max_count * self.SUMMARIZE_EXPANSION if summarize else max_count
+
+    @staticmethod
+    def fit_page_text(text: str, max_chars: int, query: str | None, summarize: bool) -> str:
+        """ Fits a page's text into `max_chars`, by summarizing it or by cutting it off. """
+        if summarize:
+            return summarize_text(text, query, max_chars)
+        return text[0:max_chars]
+
+    def assemble_page_texts(self, res_dicts: list[dict], max_count: int, query: str | None = None,
+                            summarize: bool = False) -> list[str]:
+        """ Lays out converted pages in order, cutting them off once `max_count` characters are used.
+        When summarizing, each page gets an even share of what is left instead of the first pages taking it all. """
         used = 0
         text_results = []
-        for res_dict in await self.download_pages(url_titles):
-            if "content" in res_dict:
+        pages_left = sum("text" in res_dict for res_dict in res_dicts)
+        for res_dict in res_dicts:
+            if "text" in res_dict:
                 text_results.append(f"PAGE: {res_dict['title']} (url: {res_dict['url']})")
                 used += len(text_results[-1])
                 remaining = max_count - used
                 if remaining > 0:
-                    text_results.append(html2text.html2text(res_dict['content'])[0:remaining])
+                    share = remaining // pages_left if summarize else remaining
+                    text_results.append(self.fit_page_text(res_dict['text'], share, query, summarize))
+                    pages_left -= 1
                 else:
                     break
                 used += len(text_results[-1])
                 text_results.append("-----")
+            elif "skipped" in res_dict:
+                text_results.append(self.skipped_note(res_dict))
+                used += len(text_results[-1])
         return text_results
 
-    async def download_pages(self, url_titles: list[tuple], max_concurrency=10) -> list[dict]:
-        async with httpx.AsyncClient() as client:
-            sem = asyncio.Semaphore(max_concurrency)
+    @staticmethod
+    def skipped_note(res_dict: dict) -> str:
+        return f"SKIPPED: {res_dict['title']} (url: {res_dict['url']}): {res_dict['skipped']}"
 
-            async def bounded_fetch(client, url, title):
-                async with sem:
-                    return await self.download_page(client, url, title)
+    async def iter_converted_pages(self, url_titles: list[tuple], max_count: int, deadline: float | None = None,
+                                   max_concurrency=10, query: str | None = None,
+                                   summarize: bool = False) -> AsyncIterator[str]:
+        """ Yields each page's text as soon as it is downloaded and converted, in completion order.
 
-            tasks = [bounded_fetch(client, url[0], url[1]) for url in url_titles]
-            results = await asyncio.gather(*tasks)
+        Stops once `max_count` characters have been produced, or `deadline` seconds have passed,
+        and cancels the downloads that are still outstanding. With `summarize`, each page is
+        summarized into an even share of the characters left, see `assemble_page_texts`. """
+        client = get_http_client("web")
+        sem = asyncio.Semaphore(max_concurrency)
+        max_chars = self.page_chars(max_count, summarize)
+        max_bytes = max_chars * self.bytes_per_char
+        tasks = [
+            asyncio.create_task(self.fetch_page(client, url[0], url[1], sem, max_bytes, max_chars))
+            for url in url_titles
+        ]
+        pages_left = len(tasks)
+        used = 0
+        try:
+            for next_page in asyncio.as_completed(tasks, timeout=deadline):
+                try:
+                    res_dict = await next_page
+                except TimeoutError:
+                    print(f"Page deadline of {deadline}s reached, returning the pages downloaded so far")
+                    break
+                if "skipped" in res_dict:
+                    note = self.skipped_note(res_dict)
+                    used += len(note)
+                    pages_left -= 1
+                    yield note
+                    continue
+                if "text" not in res_dict:
+                    pages_left -= 1
+                    continue
+                header = f"PAGE: {res_dict['title']} (url: {res_dict['url']})"
+                used += len(header)
+                remaining = max_count - used
+                if remaining <= 0:
+                    break
+                share = remaining // pages_left if summarize else remaining
+                pages_left -= 1
+                text = self.fit_page_text(res_dict['text'], share, query, summarize)
+                used += len(text)
+                yield "\n".join([header, text, "-----"])
+                if used >= max_count:
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def download_pages(self, url_titles: list[tuple], max_concurrency=10, max_bytes: int | None = None,
+                             max_chars: int | None = None) -> list[dict]:
+        """ Downloads the pages concurrently. When `max_chars` is given each page is also converted
+        to text (up to `max_chars`) as soon as it arrives, and returned under 'text'.
+
+        `max_concurrency` bounds the whole batch, while `host_scheduler` bounds each host with a
+        limit that adapts to the 429/5xx responses and latency it observes. """
+        client = get_http_client("web")
+        sem = asyncio.Semaphore(max_concurrency)
+
+        tasks = [self.fetch_page(client, url[0], url[1], sem, max_bytes, max_chars) for url in url_titles]
+        results = await asyncio.gather(*tasks)
 
         return results
 
-    async def download_page(self, client, url, title) -> dict:
+    async def fetch_page(self, client, url, title, sem: asyncio.Semaphore, max_bytes: int | None = None,
+                         max_chars: int | None = None) -> dict:
+        """ Downloads one page of a batch and, when `max_chars` is given, converts it to text. """
+        if not url.startswith("http"):
+            url = "https://" + url
+        if max_chars is not None and self.page_cache is not None:
+            text = await asyncio.to_thread(self.page_cache.get_text, url, self.converter.engine, max_chars)
+            if text is not None:
+                return {"url": url, "title": title, "text": text}
+
+        res_dict = await self.scheduled_download(client, url, title, sem, max_bytes)
+        if max_chars is not None and "content" in res_dict:
+            await self.convert_page(res_dict, max_chars)
+            if self.page_cache is not None and "text" in res_dict:
+                await asyncio.to_thread(
+                    self.page_cache.put_text, url, self.converter.engine, max_chars, res_dict["text"]
+                )
+        return res_dict
+
+    async def scheduled_download(self, client, url, title, sem: asyncio.Semaphore, max_bytes: int | None = None) -> dict:
+        """ Downloads a page within its host's limit and the batch limit `sem`, retrying once
+        after a throttling response whose Retry-After is short enough. """
+        host = urlsplit(url).hostname or url
+        for attempt in range(self.DOWNLOAD_RETRIES + 1):
+            # Take the host slot first, so a busy host never holds batch slots other hosts could use
+            async with self.host_scheduler.slot(host):
+                async with sem:
+                    start = time.monotonic()
+                    res_dict = await self.download_page(client, url, title, max_bytes=max_bytes)
+                    latency = time.monotonic() - start
+
+            if "status" in res_dict or "error" in res_dict:
+                self.host_scheduler.record(host, res_dict.get("status"), latency, res_dict.get("retry_after"))
+            retry_after = res_dict.get("retry_after") or 0
+            if res_dict.get("status") not in THROTTLE_STATUSES or retry_after > self.MAX_RETRY_AFTER:
+                break
+        return res_dict
+
+    async def convert_page(self, res_dict: dict, max_chars: int) -> dict:
+        try:
+            content = res_dict.pop("content")
+            if res_dict.get("kind") == "text":
+                res_dict["text"] = content[0:max_chars]
+            else:
+                res_dict["text"] = await self.converter.convert(content, max_chars)
+        except Exception as e:
+            print(f"Error converting {res_dict['url']}: {e}")
+            res_dict["error"] = str(e)
+        return res_dict
+
+    async def download_page(self, client, url, title, max_bytes: int | None = None) -> dict:
+        """ Downloads a page. Returns a dict with 'content' and its 'kind' ('html' or 'text'),
+        with 'skipped' giving the reason for content we don't download, or with 'error'. """
         try:
             if not url.startswith("http"):
                 url = "https://" + url
-            response = await client.get(url, follow_redirects=True)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            return {"url": url, "title": title, "content": response.content.decode()}
 
+            cached = None
+            if self.page_cache is not None:
+                cached = await asyncio.to_thread(self.page_cache.get, url)
+                if cached is not None and not PageCache.covers(cached, max_bytes):
+                    cached = None
+                if cached is not None and self.page_cache.is_fresh(cached):
+                    return {"url": url, "title": title, "content": cached["body"], "kind": cached.get("kind", "html")}
+            headers = PageCache.validators(cached) if cached is not None else {}
+
+            if self.preflight_head:
+                skipped = await self.preflight_page(client, url, title)
+                if skipped is not None:
+                    return skipped
+
+            if not self.stream_downloads:
+                response = await client.get(url, headers=headers, follow_redirects=True)
+                if response.status_code != 304:
+                    response.raise_for_status()  # Raise an exception for HTTP errors
+                res_dict = self._gate_response(url, title, response, response.content[0:SNIFF_BYTES])
+                if "skipped" not in res_dict:
+                    res_dict["content"] = decode_body(response.content, response.headers.get("content-type"))
+                self._add_validators(res_dict, response)
+            else:
+                res_dict = await self.stream_page(client, url, title, max_bytes, headers=headers)
+
+            if "skipped" in res_dict:
+                print(f"Skipped {url}: {res_dict['skipped']}")
+            elif self.page_cache is not None:
+                if res_dict.get("not_modified") and cached is not None:
+                    await asyncio.to_thread(
+                        self.page_cache.revalidated, url, res_dict.get("etag"), res_dict.get("last_modified")
+                    )
+                    return {"url": url, "title": title, "content": cached["body"],
+                            "kind": cached.get("kind", "html"), "status": 304}
+                await asyncio.to_thread(
+                    self.page_cache.put, url, res_dict["content"],
+                    etag=res_dict.get("etag"), last_modified=res_dict.get("last_modified"),
+                    truncated=res_dict.get("truncated", False),
+                    byte_limit=min(max_bytes or self.max_page_bytes, self.max_page_bytes),
+                    kind=res_dict["kind"],
+                )
+            return res_dict
+
+        except httpx.HTTPStatusError as e:
+            print(f"HTTP Error for {url}: {e}")
+            return {"url": url, "title": title, "error": str(e), "status": e.response.status_code,
+                    "retry_after": parse_retry_after(e.response.headers.get("retry-after"))}
         except httpx.HTTPError as e:
             print(f"HTTP Error for {url}: {e}")
             return {"url": url, "title": title, "error": str(e)}
         except Exception as e:
             print(f"Error downloading {url}: {e}")
             return {"url": url, "title": title, "error": str(e)}
+
+    async def preflight_page(self, client, url, title) -> dict | None:
+        """ Checks the page's headers with a HEAD request. Returns the skip result for content
+        we don't want, or None to go ahead with the download. """
+        try:
+            response = await client.head(url, follow_redirects=True)
+        except httpx.HTTPError:
+            return None  # Not all servers answer HEAD, let the GET decide
+        if response.is_error:
+            return None
+        res_dict = self._gate_response(url, title, response)
+        return res_dict if "skipped" in res_dict else None
+
+    async def stream_page(self, client, url, title, max_bytes: int | None = None, headers: dict | None = None) -> dict:
+        """ Streams the page body, stopping once `max_bytes` (capped at `max_page_bytes`) have been read.
+        Non-text and oversized bodies are skipped after the headers and first chunk. """
+        limit = min(max_bytes or self.max_page_bytes, self.max_page_bytes)
+        body = bytearray()
+        truncated = False
+        async with client.stream("GET", url, headers=headers, follow_redirects=True) as response:
+            if response.status_code == 304:
+                return {"url": url, "title": title, "content": "", "not_modified": True, "status": 304}
+            response.raise_for_status()  # Raise an exception for HTTP errors
+            async for chunk in response.aiter_bytes(chunk_size=16384):
+                if not body:
+                    res_dict = self._gate_response(url, title, response, chunk)
+                    if "skipped" in res_dict:
+                        return res_dict
+                body += chunk
+                if len(body) >= limit:
+                    truncated = True
+                    break
+
+        res_dict = self._gate_response(url, title, response, bytes(body[0:SNIFF_BYTES]))
+        if "skipped" not in res_dict:
+            res_dict["content"] = decode_body(bytes(body[:limit]), response.headers.get("content-type"))
+            res_dict["truncated"] = truncated
+        self._add_validators(res_dict, response)
+        return res_dict
+
+    def _gate_response(self, url, title, response: httpx.Response, head: bytes = b"") -> dict:
+        kind, reason = classify_content(
+            response.headers.get("content-type"),
+            response.headers.get("content-length"),
+            self.max_body_bytes,
+            head,
+        )
+        res_dict = {"url": url, "title": title, "status": response.status_code}
+        if kind is None:
+            res_dict["skipped"] = reason
+        else:
+            res_dict["kind"] = kind
+        return res_dict
+
+    @staticmethod
+    def _add_validators(res_dict: dict, response: httpx.Response) -> None:
+        if response.status_code == 304:
+            res_dict["not_modified"] = True
+        if response.headers.get("etag"):
+            res_dict["etag"] = response.headers["etag"]
+        if response.headers.get("last-modified"):
+            res_dict["last_modified"] = response.headers["last-modified"]
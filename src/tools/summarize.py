@@ -0,0 +1,95 @@
+import re
+
+import numpy as np
+
+from .relevance import query_terms, tokenize
+
+
+# Sentence ends, and line breaks, which in extracted page text separate headings, list items and paragraphs
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(\[])|\n+")
+# Sentences shorter than this are navigation crumbs or fragments rather than content
+MIN_SENTENCE_CHARS = 25
+# Weight of the similarity to the whole page, next to the similarity to the query
+CENTROID_WEIGHT = 0.3
+
+
+def split_sentences(text: str) -> list[str]:
+    return [sentence.strip() for sentence in SENTENCE_SPLIT_RE.split(text) if sentence and sentence.strip()]
+
+
+def sentence_scores(sentences: list[str], query: str | None = None) -> np.ndarray:
+    """TF-IDF cosine similarity of each sentence to the query, blended with its similarity to
+    the page as a whole (which is all there is without a query).
+
+    Works on (sentence, term) pairs rather than a dense matrix, so cost grows with the
+    length of the text and not with sentences x vocabulary.
+    """
+    vocabulary: dict[str, int] = {}
+    sentence_ids = []
+    term_ids = []
+    for i, sentence in enumerate(sentences):
+        for token in tokenize(sentence):
+            sentence_ids.append(i)
+            term_ids.append(vocabulary.setdefault(token, len(vocabulary)))
+    n_sentences = len(sentences)
+    n_terms = len(vocabulary)
+    if n_terms == 0:
+        return np.zeros(n_sentences)
+
+    # Term frequency per (sentence, term) pair
+    pairs, tf = np.unique(np.array(sentence_ids, dtype=np.int64) * n_terms + np.array(term_ids, dtype=np.int64),
+                          return_counts=True)
+    pair_sentences = pairs // n_terms
+    pair_terms = pairs % n_terms
+
+    df = np.bincount(pair_terms, minlength=n_terms)
+    idf = np.log((1 + n_sentences) / (1 + df)) + 1.0
+    weights = (1 + np.log(tf)) * idf[pair_terms]
+    norms = np.sqrt(np.bincount(pair_sentences, weights=weights ** 2, minlength=n_sentences))
+    norms[norms == 0] = 1.0
+
+    centroid = np.bincount(pair_terms, weights=weights, minlength=n_terms)
+    centroid /= np.linalg.norm(centroid) or 1.0
+    scores = CENTROID_WEIGHT * np.bincount(pair_sentences, weights=weights * centroid[pair_terms],
+                                           minlength=n_sentences) / norms
+
+    query_ids = [vocabulary[term] for term in query_terms(query or "") if term in vocabulary]
+    if query_ids:
+        query_vector = np.zeros(n_terms)
+        query_vector[query_ids] = idf[query_ids]
+        query_vector /= np.linalg.norm(query_vector)
+        scores += np.bincount(pair_sentences, weights=weights * query_vector[pair_terms],
+                              minlength=n_sentences) / norms
+    return scores
+
+
+def summarize_text(text: str, query: str | None, max_chars: int) -> str:
+    """Shortens `text` to at most `max_chars` by keeping its most relevant sentences, in their
+    original order, instead of cutting it off at the end."""
+    if len(text) <= max_chars:
+        return text
+    sentences = split_sentences(text)
+    candidates = [i for i, sentence in enumerate(sentences) if len(sentence) >= MIN_SENTENCE_CHARS]
+    if not candidates:
+        return text[0:max_chars]
+
+    scores = sentence_scores([sentences[i] for i in candidates], query)
+    chosen = []
+    seen = set()
+    used = 0
+    for rank in np.argsort(-scores, kind="stable"):
+        sentence_index = candidates[rank]
+        length = len(sentences[sentence_index]) + 1
+        # Repeated sentences are page furniture (teasers, captions), keep one copy at most
+        key = sentences[sentence_index].lower()
+        if used + length > max_chars or key in seen:
+            continue
+        chosen.append(sentence_index)
+        seen.add(key)
+        used += length
+        if max_chars - used < MIN_SENTENCE_CHARS:
+            break
+
+    if not chosen:
+        return text[0:max_chars]
+    return "\n".join(sentences[i] for i in sorted(chosen))
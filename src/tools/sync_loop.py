@@ -0,0 +1,44 @@
+import asyncio
+import threading
+from typing import Any, Coroutine
+
+
+class SyncLoop():
+    """An event loop on a daemon thread, for running coroutines from synchronous code.
+
+    Unlike `asyncio.run()` per call, the loop lives on between calls, so pooled HTTP
+    clients keep their connections and background cache refreshes get to finish. It
+    also works when the caller is itself running inside an event loop.
+    """
+
+    def __init__(self, name: str = "tools-sync-loop"):
+        self.name = name
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    def get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+            return self._loop
+
+    def run(self, coro: Coroutine) -> Any:
+        """Runs `coro` on the background loop and blocks until it is done."""
+        loop = self.get_loop()
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            coro.close()
+            raise RuntimeError("Blocking call made from the background loop, await the async method instead")
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+sync_loop = SyncLoop()
+
+
+def run_sync(coro: Coroutine) -> Any:
+    """Runs a coroutine to completion from synchronous code, see `SyncLoop`."""
+    return sync_loop.run(coro)
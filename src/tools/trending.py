@@ -0,0 +1,189 @@
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .page_cache import cache_dir
+from .relevance import STOP_WORDS, tokenize
+
+
+# Words too common in headlines to ever be a topic
+HEADLINE_STOP_WORDS = STOP_WORDS | {"best", "but", "were", "has", "have", "had", "will", "new", "not", "after",
+                                    "over", "into", "says", "said", "more", "than", "about", "his", "her", "its",
+                                    "their", "they", "you", "your", "our", "can", "could", "would", "may"}
+# Google News appends the publisher to every title: 'Headline text - Publisher'
+SOURCE_SUFFIX_RE = re.compile(r"\s+-\s+[^-]+$")
+
+
+def headline_terms(headline: str, exclude: set[str] = frozenset()) -> list[str]:
+    """The unigrams and bigrams of a headline, without stop words, numbers and publisher name."""
+    words = [
+        word for word in tokenize(SOURCE_SUFFIX_RE.sub("", headline))
+        if len(word) > 2 and not word.isdigit() and word not in HEADLINE_STOP_WORDS and word not in exclude
+    ]
+    return list(dict.fromkeys(words + [f"{first} {second}" for first, second in zip(words, words[1:])]))
+
+
+class TrendingTopics():
+    """Time-decayed counts of the words and word pairs in a stream of headlines.
+
+    Every term has a slot in two parallel arrays: `recent`, which halves every
+    `half_life` seconds, and `baseline`, which halves every `baseline_half_life`. Adding
+    headlines decays both arrays once and increments the slots of their terms, so top-N
+    and spike queries read the arrays instead of rescanning headlines. Headlines already
+    counted are ignored, which makes it safe to feed the same feed on every poll.
+
+    With a `path`, the state is saved there (as .npz) after each update and loaded on start.
+    """
+
+    SEEN_MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, half_life: float = 6 * 3600, baseline_half_life: float = 7 * 24 * 3600,
+                 max_terms: int = 50_000, path: str | Path | None = None):
+        self.half_life = half_life
+        self.baseline_half_life = baseline_half_life
+        self.max_terms = max_terms
+        self.path = Path(path).expanduser() if path else None
+        self.terms: list[str] = []
+        self.index: dict[str, int] = {}
+        self.recent = np.zeros(0)
+        self.baseline = np.zeros(0)
+        self.updated_at: float | None = None
+        # Hash of each counted headline -> when it was first seen
+        self.seen: dict[int, float] = {}
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    @classmethod
+    def from_env(cls, name: str, **options) -> "TrendingTopics":
+        """Engine persisted under $TOOLS_CACHE_DIR/trending, or an in-memory one without that variable."""
+        directory = cache_dir("trending")
+        safe_name = re.sub(r"[^\w.-]+", "_", name.lower())
+        return cls(path=directory / f"{safe_name}.npz" if directory else None, **options)
+
+    def add(self, headlines: list[str], now: float | None = None, exclude: set[str] = frozenset()) -> int:
+        """Counts the headlines not seen before and returns how many there were."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._decay(now)
+            slots = []
+            added = 0
+            for headline in headlines:
+                if not headline:
+                    continue
+                key = int.from_bytes(hashlib.blake2b(headline.lower().encode(), digest_size=8).digest(), "big")
+                if key in self.seen:
+                    continue
+                self.seen[key] = now
+                added += 1
+                slots.extend(self._slot(term) for term in headline_terms(headline, exclude))
+            if slots:
+                counts = np.bincount(np.array(slots), minlength=len(self.recent))
+                self.recent += counts
+                self.baseline += counts
+            self._prune(now)
+        if added and self.path is not None:
+            self.save()
+        return added
+
+    def top(self, n: int = 10, now: float | None = None, exclude: set[str] = frozenset()) -> list[tuple[str, float]]:
+        """The `n` terms with the highest recent counts, as (term, count) pairs."""
+        with self._lock:
+            self._decay(time.time() if now is None else now)
+            return self._best(self.recent, n, exclude)
+
+    def spikes(self, n: int = 10, now: float | None = None, min_count: float = 2.0,
+               min_ratio: float = 3.0, exclude: set[str] = frozenset()) -> list[tuple[str, float]]:
+        """Terms whose recent count is far above what their long-term baseline predicts,
+        as (term, ratio) pairs, highest ratio first."""
+        with self._lock:
+            self._decay(time.time() if now is None else now)
+            # Both arrays get every count, so the baseline minus the recent counts is what came before,
+            # scaled down to the count it predicts for one recent window
+            before = np.maximum(self.baseline - self.recent, 0)
+            ratio = self.recent / (before * (self.half_life / self.baseline_half_life) + 1.0)
+            ratio[(self.recent < min_count) | (ratio < min_ratio)] = 0
+            return self._best(ratio, n, exclude)
+
+    def _best(self, scores: np.ndarray, n: int, exclude: set[str]) -> list[tuple[str, float]]:
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > n + len(exclude):
+            keep = n + len(exclude)
+            candidates = candidates[np.argpartition(-scores[candidates], keep - 1)[0:keep]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        best = []
+        for slot in candidates:
+            term = self.terms[slot]
+            if term in exclude or any(word in exclude for word in term.split(" ")):
+                continue
+            best.append((term, round(float(scores[slot]), 3)))
+            if len(best) == n:
+                break
+        return best
+
+    def _slot(self, term: str) -> int:
+        slot = self.index.get(term)
+        if slot is None:
+            slot = len(self.terms)
+            self.index[term] = slot
+            self.terms.append(term)
+            if slot >= len(self.recent):
+                # Grow the arrays geometrically
+                size = max(1024, 2 * len(self.recent))
+                self.recent = np.concatenate([self.recent, np.zeros(size - len(self.recent))])
+                self.baseline = np.concatenate([self.baseline, np.zeros(size - len(self.baseline))])
+        return slot
+
+    def _decay(self, now: float) -> None:
+        if self.updated_at is not None and now > self.updated_at:
+            elapsed = now - self.updated_at
+            self.recent *= 0.5 ** (elapsed / self.half_life)
+            self.baseline *= 0.5 ** (elapsed / self.baseline_half_life)
+        if self.updated_at is None or now > self.updated_at:
+            self.updated_at = now
+
+    def _prune(self, now: float) -> None:
+        self.seen = {key: seen_at for key, seen_at in self.seen.items() if now - seen_at < self.SEEN_MAX_AGE}
+        if len(self.terms) <= self.max_terms:
+            return
+        # Drop the terms that have faded the most, keeping the arrays the same order as `terms`
+        count = len(self.terms)
+        keep = np.sort(np.argpartition(-self.baseline[0:count], self.max_terms // 2)[0:self.max_terms // 2])
+        self._restore([self.terms[slot] for slot in keep], self.recent[keep], self.baseline[keep])
+
+    def _restore(self, terms: list[str], recent: np.ndarray, baseline: np.ndarray) -> None:
+        self.terms = list(terms)
+        self.index = {term: slot for slot, term in enumerate(self.terms)}
+        self.recent = np.array(recent, dtype=np.float64)
+        self.baseline = np.array(baseline, dtype=np.float64)
+
+    def save(self) -> None:
+        with self._lock:
+            count = len(self.terms)
+            state = {
+                "terms": np.array(self.terms, dtype=np.str_),
+                "recent": self.recent[0:count],
+                "baseline": self.baseline[0:count],
+                "updated_at": np.array([self.updated_at or 0.0]),
+                "seen_keys": np.array(list(self.seen.keys()), dtype=np.uint64),
+                "seen_at": np.array(list(self.seen.values()), dtype=np.float64),
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.stem}.{os.getpid()}.{threading.get_ident()}.tmp.npz")
+        np.savez(tmp_path, **state)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        try:
+            with np.load(self.path) as state:
+                terms = [str(term) for term in state["terms"]]
+                self._restore(terms, state["recent"], state["baseline"])
+                self.updated_at = float(state["updated_at"][0]) or None
+                self.seen = dict(zip((int(key) for key in state["seen_keys"]), (float(at) for at in state["seen_at"])))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Could not load trending state from {self.path}: {e}")
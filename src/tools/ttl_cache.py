@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class TTLCache():
+    """Small in-memory cache with per-entry TTLs and stale-while-revalidate.
+
+    An entry is fresh for `ttl` seconds. After that it may still be served for another
+    `stale_ttl` seconds while a refresh runs in the background. Falsy values (no
+    results, errors) are never cached. Hit and miss counts are kept for monitoring.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float = 0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[Hashable, tuple[Any, float, float]] = OrderedDict()
+        self._refreshing: set[Hashable] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._lock = threading.Lock()
+
+    def lookup(self, key: Hashable) -> tuple[Any, str | None]:
+        """Returns `(value, state)` where state is 'fresh', 'stale' or None for a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, None
+            value, stored_at, ttl = entry
+            age = time.monotonic() - stored_at
+            if age < ttl:
+                self._entries.move_to_end(key)
+                return value, "fresh"
+            if age < ttl + self.stale_ttl:
+                return value, "stale"
+            del self._entries[key]
+            return None, None
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if not value:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic(), self.ttl if ttl is None else ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def count(self, state: str | None) -> None:
+        with self._lock:
+            if state == "fresh":
+                self.hits += 1
+            elif state == "stale":
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float | None = None) -> Any:
+        """Returns the cached value for `key`, calling `fetch()` on a miss.
+
+        Stale values are returned immediately and refreshed in the background.
+        """
+        value, state = self.lookup(key)
+        self.count(state)
+        if state == "fresh":
+            return value
+        if state == "stale":
+            self._refresh_in_background(key, fetch, ttl)
+            return value
+
+        value = await fetch()
+        self.set(key, value, ttl)
+        return value
+
+    def _refresh_in_background(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], ttl: float | None) -> None:
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                self.set(key, await fetch(), ttl)
+            except Exception as e:
+                print(f"Background refresh failed for {key}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.create_task(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
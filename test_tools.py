@@ -1,9 +1,21 @@
 import asyncio
 import pytest
 from typing import Any
+import httpx
 import pandas as pd
 
-from tools import GoogleNewsTool, LinkedinDataTool
+from tools import GoogleNewsTool, LinkedinDataTool, ScaleSerpBrowserTool, HttpClientRegistry
+from tools.host_scheduler import HostLimiter, HostScheduler
+from tools.html_text import HtmlConverter, extract_text
+from tools.latency import LatencyStats
+from tools.near_duplicates import cluster_titles
+from tools.news_frame import news_frame
+from tools.news_links import DecodeCache, GoogleNewsLinkDecoder
+from tools.page_cache import PageCache
+from tools.relevance import query_terms, select_results
+from tools.summarize import summarize_text
+from tools.trending import TrendingTopics
+from tools.ttl_cache import TTLCache
 
 
 @pytest.mark.asyncio
@@ -47,6 +59,774 @@ def test_google_news_headlines() -> None:
     assert 'source' in headlines.columns
 
 
+def test_http_client_registry_reuses_clients_per_loop() -> None:
+    """Test that pooled clients are shared within a loop and rebuilt for a new loop."""
+
+    registry = HttpClientRegistry()
+
+    async def get_clients():
+        first = registry.get_client("web")
+        assert registry.get_client("web") is first
+        assert registry.get_client("linkedin") is not first
+        return first
+
+    client_a = asyncio.run(get_clients())
+    client_b = asyncio.run(get_clients())
+    assert client_a is not client_b
+
+    async def close_clients():
+        client = registry.get_client("web")
+        await registry.aclose()
+        assert client.is_closed
+
+    asyncio.run(close_clients())
+
+
+@pytest.mark.asyncio
+async def test_download_page_stops_at_byte_budget() -> None:
+    """Test that streamed downloads stop reading once the byte budget is used."""
+
+    body = b"<html><body>" + b"<p>hello world</p>" * 10000 + b"</body></html>"
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, content=body))
+
+    browser = ScaleSerpBrowserTool()
+    async with httpx.AsyncClient(transport=transport) as client:
+        page = await browser.download_page(client, "https://example.com", "Example", max_bytes=1000)
+
+    assert page["truncated"]
+    assert len(page["content"]) == 1000
+
+
+@pytest.mark.asyncio
+async def test_html_converter_pool_matches_inline() -> None:
+    """Test that pooled conversion gives the same text as inline conversion."""
+
+    html = "<html><body>" + "<h2>Title</h2><p>Some <b>bold</b> text.</p>" * 2000 + "</body></html>"
+
+    inline = await HtmlConverter("inline").convert(html, 500)
+    pooled = await HtmlConverter("thread", inline_bytes=100).convert(html, 500)
+
+    assert inline == pooled
+    assert len(pooled) == 500
+
+
+def test_incremental_extractor_skips_boilerplate() -> None:
+    """Test that the incremental extractor drops page chrome and honours the budget."""
+
+    html = (
+        "<html><head><style>p {}</style></head><body>"
+        "<nav><a href='/'>Home</a></nav><div class='cookie-banner'>We use cookies</div>"
+        "<article><h1>Headline</h1><p>Body &amp; text.</p><script>var x;</script></article>"
+        "<footer>Copyright</footer></body></html>"
+    )
+
+    assert extract_text(html) == "# Headline\n\nBody & text."
+    assert extract_text(html, 10) == "# Headline"
+
+
+def test_incremental_extractor_keeps_wrappers_with_state_classes() -> None:
+    """Test that theme state classes on page wrappers do not drop the page."""
+
+    html = (
+        "<html class='no-js menu-closed'><body class='single has-sidebar'>"
+        "<div id='main' class='content share-enabled'><article class='post comments-open'>"
+        "<p>Body text.</p><div class='sidebar'>Popular posts</div></article></div></body></html>"
+    )
+
+    assert extract_text(html) == "Body text."
+
+
+def test_incremental_extractor_closes_skipped_elements_with_omitted_end_tags() -> None:
+    """Test that skipped elements whose end tag was left out don't swallow the rest of the page."""
+
+    assert extract_text("<html><head><title>T</title><body><h1>Hello</h1><p>World</p>") == "# Hello\n\nWorld"
+    assert extract_text("<div><p class=share>Share<p>Real paragraph.</div><p>After") == "Real paragraph.\n\nAfter"
+    assert extract_text("<ul><li class=share>Share<li>Item</ul><p>After") == "* Item\n\nAfter"
+    # ASP.NET pages wrap the whole body in one <form>
+    html = "<body><form id='aspnetForm' method='post'><h1>Title</h1><p>Body.</p><input type='hidden'></form></body>"
+    assert extract_text(html) == "# Title\n\nBody."
+
+
+@pytest.mark.asyncio
+async def test_page_cache_revalidates_with_etag(tmp_path) -> None:
+    """Test that stale cache entries are revalidated and served on 304 Not Modified."""
+
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"<p>cached page</p>", headers={"ETag": '"v1"'})
+
+    browser = ScaleSerpBrowserTool(page_cache=PageCache(tmp_path, max_age=0))
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        first = await browser.download_page(client, "https://example.com/a?utm_source=x", "A")
+        second = await browser.download_page(client, "https://EXAMPLE.com/a", "A")
+
+    assert first["content"] == second["content"] == "<p>cached page</p>"
+    assert len(requests) == 2
+    assert requests[1].headers["if-none-match"] == '"v1"'
+
+
+def test_page_cache_evicts_without_rescanning_every_write(monkeypatch, tmp_path) -> None:
+    """Test that the page cache tracks its size on writes and only scans the directory to evict."""
+    import os
+
+    cache = PageCache(tmp_path, max_bytes=40_000)
+    scans = []
+    scan = cache._scan
+    monkeypatch.setattr(cache, "_scan", lambda: scans.append(1) or scan())
+
+    for i in range(100):
+        cache.put(f"https://example.com/{i}", os.urandom(1000).hex())
+        os.utime(cache._meta_path(f"https://example.com/{i}"), (i, i))
+
+    assert cache.size() <= 40_000
+    assert len(scans) < 20
+    assert cache.get("https://example.com/0") is None
+    assert cache.get("https://example.com/99") is not None
+    # The index matches what is on disk
+    indexed = cache.size()
+    cache._sizes = None
+    assert cache.size() == indexed
+
+
+@pytest.mark.asyncio
+async def test_ttl_cache_serves_stale_while_refreshing() -> None:
+    """Test TTL expiry, stale-while-revalidate and the hit/miss counters."""
+
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return [("https://example.com", f"result {len(calls)}")]
+
+    cache = TTLCache(ttl=0.05, stale_ttl=10)
+    first = await cache.get_or_fetch("query", fetch)
+    assert await cache.get_or_fetch("query", fetch) == first
+
+    await asyncio.sleep(0.06)
+    assert await cache.get_or_fetch("query", fetch) == first  # stale value, refresh scheduled
+    await asyncio.sleep(0.01)
+    assert (await cache.get_or_fetch("query", fetch))[0][1] == "result 2"
+
+    assert len(calls) == 2
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["stale_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_hedged_search_takes_first_answer(monkeypatch) -> None:
+    """Test that a slow ScaleSerp search is hedged with ScrapingBee and then cancelled."""
+
+    cancelled = []
+
+    async def slow_scaleserp(search, api_key):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return [("https://slow.example.com", "slow")]
+
+    async def fast_scrapingbee(search):
+        return [("https://fast.example.com", "fast")]
+
+    monkeypatch.setenv("SCRAPINGBEE_API_KEY", "test")
+    monkeypatch.setattr(ScaleSerpBrowserTool, "HEDGE_DEFAULT_DELAY", 0.01)
+    monkeypatch.setattr(ScaleSerpBrowserTool, "try_scrapingbee", staticmethod(fast_scrapingbee))
+
+    browser = ScaleSerpBrowserTool(hedge_searches=True)
+    monkeypatch.setattr(browser, "search_scaleserp", slow_scaleserp)
+    browser.provider_latency = {"scaleserp": LatencyStats(), "scrapingbee": LatencyStats()}
+
+    urls = await browser.hedged_search("python asyncio", "key")
+    await asyncio.sleep(0)
+
+    assert urls == [("https://fast.example.com", "fast")]
+    assert cancelled == [True]
+
+    # A caller cancelled during the hedge delay takes the ScaleSerp request down with it
+    monkeypatch.setattr(ScaleSerpBrowserTool, "HEDGE_DEFAULT_DELAY", 5)
+    search = asyncio.create_task(browser.hedged_search("python asyncio", "key"))
+    await asyncio.sleep(0.01)
+    search.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await search
+    await asyncio.sleep(0)
+    assert cancelled == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_download_pages_backs_off_throttled_host(monkeypatch) -> None:
+    """Test per-host limits, the AIMD decrease on 429 and the Retry-After retry."""
+
+    active = {"a.example.com": 0}
+    peak = {"a.example.com": 0}
+    attempts = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        attempts.append(str(request.url))
+        if host in active:
+            active[host] += 1
+            peak[host] = max(peak[host], active[host])
+            await asyncio.sleep(0.01)
+            active[host] -= 1
+        if request.url.path == "/busy" and attempts.count(str(request.url)) == 1:
+            return httpx.Response(429, headers={"Retry-After": "0"})
+        return httpx.Response(200, content=b"<p>ok</p>")
+
+    scheduler = HostScheduler(per_host_initial=2, per_host_max=2)
+    browser = ScaleSerpBrowserTool(page_cache=False)
+    monkeypatch.setattr(browser, "host_scheduler", scheduler)
+    monkeypatch.setattr("tools.scaleserp_browser.get_http_client",
+                        lambda upstream: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    url_titles = [(f"https://a.example.com/{i}", "") for i in range(6)]
+    url_titles += [("https://b.example.com/busy", ""), ("https://c.example.com/", "")]
+    results = await browser.download_pages(url_titles)
+
+    assert all("content" in res for res in results)
+    assert peak["a.example.com"] <= 2
+    assert attempts.count("https://b.example.com/busy") == 2
+
+    scheduler.record("d.example.com", 429, retry_after=0)
+    assert scheduler.limits()["d.example.com"] == 1
+    scheduler.record("d.example.com", 200, latency=0.1)
+    assert scheduler.limits()["d.example.com"] == 2
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_passes_on_wakeup_of_cancelled_waiter() -> None:
+    """Test that a waiter cancelled right after being woken hands its slot to the next waiter."""
+    limiter = HostLimiter(initial=1, max_limit=1)
+    await limiter.acquire()
+    first = asyncio.create_task(limiter.acquire())
+    second = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    limiter.release()
+    first.cancel()
+    await asyncio.wait_for(second, timeout=1)
+
+    assert first.cancelled()
+    assert limiter.active == 1
+
+
+@pytest.mark.asyncio
+async def test_iter_converted_pages_returns_fast_pages_by_deadline(monkeypatch) -> None:
+    """Test that pages stream in completion order and slow pages are dropped at the deadline."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "slow.example.com":
+            await asyncio.sleep(5)
+        return httpx.Response(200, content=f"<p>{request.url.host}</p>".encode())
+
+    browser = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+    monkeypatch.setattr("tools.scaleserp_browser.get_http_client",
+                        lambda upstream: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    url_titles = [("https://slow.example.com", "Slow"), ("https://fast.example.com", "Fast")]
+    pages = [page async for page in browser.iter_converted_pages(url_titles, 1000, deadline=0.2)]
+
+    assert len(pages) == 1
+    assert pages[0].startswith("PAGE: Fast")
+
+
+@pytest.mark.asyncio
+async def test_download_page_gates_content_type_and_charset() -> None:
+    """Test that binary content is skipped with a reason and declared charsets are honoured."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/report.pdf":
+            return httpx.Response(200, content=b"%PDF-1.7", headers={"Content-Type": "application/pdf"})
+        if request.url.path == "/huge":
+            return httpx.Response(200, content=b"<p>x</p>", headers={"Content-Type": "text/html", "Content-Length": "999999999"})
+        return httpx.Response(200, content="<p>caf\u00e9</p>".encode("latin-1"),
+                              headers={"Content-Type": "text/html; charset=ISO-8859-1"})
+
+    browser = ScaleSerpBrowserTool(page_cache=False)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        pdf = await browser.download_page(client, "https://example.com/report.pdf", "PDF")
+        huge = await browser.download_page(client, "https://example.com/huge", "Huge")
+        page = await browser.download_page(client, "https://example.com/cafe", "Cafe")
+
+    assert pdf["skipped"] == "unsupported content type application/pdf"
+    assert "exceeds" in huge["skipped"]
+    assert page["content"] == "<p>caf\u00e9</p>"
+
+
+@pytest.mark.asyncio
+async def test_browse_web_batch_downloads_shared_pages_once(monkeypatch) -> None:
+    """Test that pages found by several searches are downloaded once and shared."""
+
+    downloads = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        downloads.append(str(request.url))
+        return httpx.Response(200, content=f"<p>{request.url.path}</p>".encode())
+
+    async def search_urls(search, api_key):
+        return {
+            "python async": [("https://example.com/shared", "Shared"), ("https://example.com/a", "A")],
+            "python asyncio": [("https://example.com/shared?utm_source=x", "Shared"), ("https://example.com/b", "B")],
+        }[search]
+
+    monkeypatch.setenv("SCALESERP_API_KEY", "test")
+    browser = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+    monkeypatch.setattr(browser, "search_urls", search_urls)
+    monkeypatch.setattr("tools.scaleserp_browser.get_http_client",
+                        lambda upstream: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    results = await browser.browse_web_batch(["python async", "python asyncio"])
+
+    assert sorted(downloads) == ["https://example.com/a", "https://example.com/b", "https://example.com/shared"]
+    assert "/shared" in results["python async"] and "/a" in results["python async"]
+    assert "/shared" in results["python asyncio"] and "/b" in results["python asyncio"]
+
+
+def test_select_results_covers_query_with_fewest_pages() -> None:
+    """Test that re-ranking prefers the results whose snippets cover the query."""
+
+    results = [
+        ("https://a.example.com", "Company homepage", "Welcome to our site"),
+        ("https://b.example.com", "Rust async runtime", "tokio scheduler internals"),
+        ("https://c.example.com", "Python asyncio event loop", "How the asyncio event loop schedules tasks"),
+        ("https://d.example.com", "Python packaging", "pip and wheels"),
+    ]
+
+    chosen = select_results("python asyncio event loop site:docs.python.org", results, min_pages=1)
+
+    assert chosen == [results[2]]
+    assert len(select_results("python asyncio", results, min_pages=2)) == 2
+
+    # Hyphenated words are query terms, only a leading hyphen excludes a term
+    assert query_terms("e-commerce platforms -amazon -\"free shipping\"") == ["e", "commerce", "platforms"]
+    assert query_terms("covid-19 vaccine") == ["covid", "19", "vaccine"]
+
+
+@pytest.mark.asyncio
+async def test_download_web_pages_crawls_same_site_links(monkeypatch) -> None:
+    """Test that crawl mode follows same-site links, prefers about/team pages and stops at max_pages."""
+
+    site = {
+        "/": '<a href="/blog/2020/01/post">Post</a> <a href="/about">About</a> '
+             '<a href="https://other.example.org/">Elsewhere</a> <a href="/team#top">Team</a> <p>Home</p>',
+        "/about": '<a href="/">Home</a> <a href="/about/history">History</a> <p>About us</p>',
+        "/team": "<p>Our team</p>",
+    }
+    fetched = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fetched.append(request.url.path)
+        return httpx.Response(200, content=site.get(request.url.path, "<p>other</p>").encode())
+
+    browser = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+    monkeypatch.setattr("tools.crawler.get_http_client",
+                        lambda upstream: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    text = await browser.download_web_pages(["https://www.example.com/"], crawl=True, max_depth=1, max_pages=3)
+
+    assert sorted(fetched) == ["/", "/about", "/team"]
+    assert "About us" in text and "Our team" in text
+
+    # Links after a long <head> are still found
+    site["/"] = f"<html><head><style>{'p {}' * 30000}</style></head><body>{site['/']}</body></html>"
+    fetched.clear()
+    text = await browser.download_web_pages(["https://www.example.com/"], crawl=True, max_depth=1, max_pages=3)
+    assert sorted(fetched) == ["/", "/about", "/team"]
+
+
+def test_summarize_text_keeps_relevant_sentences_in_order() -> None:
+    """Test that the summary fits the budget, keeps the query's sentences in page order and drops repeats."""
+
+    filler = "Subscribe to our newsletter for the latest updates and offers. "
+    text = (
+        "The harbour bridge opened to traffic in 1932 after eight years of work. "
+        + filler * 20
+        + "Engineers repainted the harbour bridge with a new grey coating last spring. "
+        + filler * 20
+    )
+
+    summary = summarize_text(text, "harbour bridge", 200)
+
+    assert len(summary) <= 200
+    assert summary.index("opened to traffic") < summary.index("repainted")
+    assert summary.count("Subscribe") <= 1
+    assert summarize_text("Short page.", "bridge", 200) == "Short page."
+
+
+def rss_feed(*titles: str) -> bytes:
+    """A Google News style RSS feed with one item per title, linking to a page named after the title."""
+    from urllib.parse import quote
+
+    items = "".join(
+        f"<item><title>{title}</title><link>https://example.com/{quote(title)}</link>"
+        f"<guid isPermaLink=\"false\">{quote(title)}</guid>"
+        f"<pubDate>Wed, 01 May 2024 12:00:00 GMT</pubDate>"
+        f"<description>&lt;a href=\"https://example.com/{quote(title)}\"&gt;{title}&lt;/a&gt;</description>"
+        f"<source url=\"https://example.com\">Example</source></item>"
+        for title in titles
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+
+
+def mock_news_client(monkeypatch, handler) -> None:
+    monkeypatch.setattr("tools.google_news.get_http_client",
+                        lambda upstream: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+
+def test_google_news_feed_cache(monkeypatch) -> None:
+    """Test that repeated feed requests are served from the feed cache and counted."""
+    from datetime import date
+
+    fetches = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        fetches.append(request.url.params["gl"])
+        return httpx.Response(200, content=rss_feed("Headline"))
+
+    mock_news_client(monkeypatch, handler)
+    monkeypatch.setattr(GoogleNewsTool, "feed_cache", TTLCache(ttl=60))
+    news = GoogleNewsTool()
+
+    news.get_top_headlines()
+    df = news.get_top_headlines()
+    news.get_trending_topics()
+    news.get_top_headlines(country="GB")
+
+    assert fetches == ["US", "GB"]
+    assert list(df["title"]) == ["Headline"]
+    assert news.feed_cache_stats()["hits"] == 2
+    assert news.feed_cache_stats()["misses"] == 2
+    assert news.feed_ttl("search", before=date(2020, 1, 1)) == GoogleNewsTool.FEED_TTLS["historical"]
+    assert news.feed_ttl("search", before=date(2020, 1, 1), when="1d") == GoogleNewsTool.FEED_TTLS["search"]
+
+
+@pytest.mark.asyncio
+async def test_google_news_async_queries_run_concurrently(monkeypatch) -> None:
+    """Test that async news queries overlap, and that the sync API still works inside a running loop."""
+    active = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return httpx.Response(200, content=rss_feed(request.url.params["q"]))
+
+    mock_news_client(monkeypatch, handler)
+    news = GoogleNewsTool(cache_feeds=False)
+
+    frames = await asyncio.gather(*[news.aquery_news(f"topic {i}") for i in range(5)])
+    local = news.get_location_news("Paris")
+
+    assert peak == 5
+    assert [df["title"][0] for df in frames] == [f"topic {i} when:1d" for i in range(5)]
+    assert local["title"][0] == 'location:"Paris"'
+
+
+def test_google_news_batch_query_dedups_across_queries(monkeypatch) -> None:
+    """Test that a batch sweep tags rows with their query and locale and drops repeated articles."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.params.get("gl") == "FR":
+            return httpx.Response(500)
+        titles = ["Shared story", request.url.params.get("q", "headline")]
+        return httpx.Response(200, content=rss_feed(*titles))
+
+    mock_news_client(monkeypatch, handler)
+    news = GoogleNewsTool(cache_feeds=False)
+
+    df = news.query_news_batch(["ai", "chips", None], locales=[("en", "US"), ("en", "GB"), ("fr", "FR")])
+
+    us = df[df["country"] == "US"]
+    assert len(df) == 8
+    assert set(df["country"]) == {"US", "GB"}
+    assert list(us["query"][0:3]) == ["ai", "ai", "chips"] and pd.isna(us["query"].iloc[3])
+    assert list(us["title"]) == ["Shared story", "ai when:1d", "chips when:1d", "headline"]
+    assert {"query", "language", "country", "title"} <= set(df.columns)
+
+
+def test_news_frame_is_columnar() -> None:
+    """Test that news frames get a UTC datetime64 pubDate, categorical sources and survive empty feeds."""
+    df = news_frame({
+        "title": ["a", "b", "c"],
+        "link": ["https://example.com/a", "https://example.com/b", "https://example.com/c"],
+        "pubDate": ["Wed, 01 May 2024 12:00:00 GMT", "Wed, 01 May 2024 14:00:00 +0200", None],
+        "description": ["a", "b", "c"],
+        "source": ["Example", "Example", "Other"],
+    })
+
+    assert str(df["pubDate"].dtype) == "datetime64[ns, UTC]"
+    assert df["pubDate"][0] == df["pubDate"][1] == pd.Timestamp("2024-05-01 12:00", tz="UTC")
+    assert pd.isna(df["pubDate"][2])
+    assert df["source"].dtype == "category"
+    assert len(GoogleNewsTool()._news_items_to_df([])) == 0
+
+
+def test_news_frame_arrow_backend() -> None:
+    """Test that arrow_frames returns pyarrow-backed columns (needs the 'arrow' extra)."""
+    pytest.importorskip("pyarrow")
+    df = news_frame({
+        "title": ["a", "b"],
+        "link": ["https://example.com/a", "https://example.com/b"],
+        "pubDate": ["Wed, 01 May 2024 12:00:00 GMT", None],
+        "description": ["a", None],
+        "source": ["Example", "Example"],
+    }, arrow=True)
+
+    assert str(df["title"].dtype) == "string[pyarrow]"
+    assert str(df["pubDate"].dtype).startswith("timestamp[ns, tz=UTC]")
+    assert df["pubDate"][0] == pd.Timestamp("2024-05-01 12:00", tz="UTC")
+    assert pd.isna(df["description"][1])
+
+
+def test_google_news_stops_reading_feed_at_max_results(monkeypatch) -> None:
+    """Test that the RSS feed is parsed incrementally and no longer read once max_results items are in."""
+    feed = rss_feed(*[f"Story {i}" for i in range(100)])
+    chunks_read = 0
+
+    async def body():
+        nonlocal chunks_read
+        for start in range(0, len(feed), 256):
+            chunks_read += 1
+            yield feed[start:start + 256]
+
+    mock_news_client(monkeypatch, lambda request: httpx.Response(200, content=body()))
+    news = GoogleNewsTool(cache_feeds=False)
+
+    df = news.get_location_news("Paris", max_results=3)
+
+    assert list(df["title"]) == ["Story 0", "Story 1", "Story 2"]
+    assert df["description"][0] == "Story 0"
+    assert df["source"][0] == "Example"
+    assert chunks_read < len(feed) // 256 // 4
+
+
+def test_trending_topics_decay_spikes_and_persist(tmp_path) -> None:
+    """Test that the trending engine ranks decayed word and pair counts, flags spikes and reloads its state."""
+    day = 24 * 3600
+    start = 1_700_000_000
+    engine = TrendingTopics(path=tmp_path / "headlines.npz")
+    for i in range(14):
+        engine.add([f"Weather service issues forecast {i} - AP"], now=start + i * day)
+    now = start + 14 * day
+    headlines = ["Volcano erupts in Iceland - BBC", "Iceland volcano forces evacuations - CNN",
+                 "Weather forecast warns of ash from Iceland volcano - AP"]
+    engine.add(headlines, now=now)
+
+    assert engine.add(headlines, now=now) == 0
+    assert {term for term, _ in engine.top(2, now=now)} == {"iceland", "volcano"}
+    assert "iceland volcano" in dict(engine.top(10, now=now))
+    spikes = dict(engine.spikes(now=now))
+    assert "volcano" in spikes and "forecast" not in spikes and "weather" not in spikes
+
+    reloaded = TrendingTopics(path=tmp_path / "headlines.npz")
+    assert reloaded.top(3, now=now) == engine.top(3, now=now)
+    assert reloaded.add(headlines, now=now) == 0
+
+
+@pytest.mark.asyncio
+async def test_news_link_decoder_runs_concurrently_and_caches(monkeypatch, tmp_path) -> None:
+    """Test that Google News links are decoded in parallel off the loop, once each, and remembered on disk."""
+    import time
+
+    calls = []
+
+    def fake_decoder(url, interval=None):
+        calls.append(url)
+        time.sleep(0.2)
+        return {"status": True, "decoded_url": url.replace("https://news.google.com/rss/articles/", "https://example.com/")}
+
+    monkeypatch.setattr("tools.news_links.new_decoderv1", fake_decoder)
+    links = [f"https://news.google.com/rss/articles/{i}" for i in range(4)]
+    decoder = GoogleNewsLinkDecoder(max_workers=4, cache=DecodeCache(tmp_path / "decoded.sqlite"))
+
+    started = time.monotonic()
+    results = await decoder.decode_many(links + links[0:2] + ["https://example.org/plain"])
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 0.6
+    assert sorted(calls) == links
+    assert results[links[3]]["decoded_url"] == "https://example.com/3"
+    assert results["https://example.org/plain"]["decoded_url"] == "https://example.org/plain"
+
+    reopened = GoogleNewsLinkDecoder(cache=DecodeCache(tmp_path / "decoded.sqlite"))
+    assert (await reopened.decode(links[1]))["decoded_url"] == "https://example.com/1"
+    assert len(calls) == 4
+
+    # A caller cancelled while the decode is still queued leaves it to the others
+    single = GoogleNewsLinkDecoder(max_workers=1, cache=DecodeCache())
+    busy = asyncio.create_task(single.decode("https://news.google.com/rss/articles/8"))
+    waiting = [asyncio.create_task(single.decode("https://news.google.com/rss/articles/9")) for _ in range(2)]
+    await asyncio.sleep(0.05)
+    waiting[0].cancel()
+    assert (await waiting[1])["decoded_url"] == "https://example.com/9"
+    await busy
+
+    assert GoogleNewsTool(cache_feeds=False).link_decoder is GoogleNewsTool().link_decoder
+
+
+@pytest.mark.asyncio
+async def test_download_news_articles_shares_budget(monkeypatch) -> None:
+    """Test that a news DataFrame is downloaded in one batch, keyed by row, within one character budget."""
+    monkeypatch.setattr("tools.news_links.new_decoderv1",
+                        lambda url, interval=None: {"status": True, "decoded_url": url.replace("news.google.com", "example.com")})
+    pages = {"/long-a": "a" * 5000, "/long-b": "b" * 5000, "/short": "s" * 200}
+    mock_news_client(monkeypatch, lambda request: httpx.Response(
+        200, headers={"Content-Type": "text/plain"}, content=pages[request.url.path].encode()))
+    news = GoogleNewsTool(cache_feeds=False)
+    news.browser_tool = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+
+    df = pd.DataFrame({
+        "title": ["Long A", "Short", "Long B", "Long A again"],
+        "link": ["https://news.google.com/long-a", "https://news.google.com/short",
+                 "https://news.google.com/long-b", "https://news.google.com/long-a"],
+    }, index=[10, 11, 12, 13])
+
+    texts = await news.download_news_articles(df, max_chars=3000, skip_duplicates=False)
+
+    assert list(texts) == [10, 11, 12, 13]
+    assert texts[11].endswith("s" * 200)
+    assert texts[10].count("a") >= 1300 and texts[12].count("b") >= 1300
+    assert texts[10].count("a") + texts[11].count("s") + texts[12].count("b") <= 3100
+    assert texts[13] == texts[10].replace("Long A", "Long A again")
+
+    # A decode cancelled under one row is reported for that row only
+    decode = news.link_decoder.decode
+
+    async def cancelled_decode(url: str) -> dict:
+        if url.endswith("/short"):
+            raise asyncio.CancelledError()
+        return await decode(url)
+
+    monkeypatch.setattr(news.link_decoder, "decode", cancelled_decode)
+    texts = await news.download_news_articles(df, max_chars=3000, skip_duplicates=False)
+    assert texts[11].startswith("Error") and texts[12].startswith("PAGE")
+
+
+@pytest.mark.asyncio
+async def test_news_near_duplicates_are_collapsed_and_skipped(monkeypatch) -> None:
+    """Test that wire stories from several outlets collapse into one row and are downloaded once."""
+    titles = ["Volcano erupts in Iceland, forcing evacuations - BBC",
+              "Iceland volcano erupts forcing evacuations - CNN",
+              "Stocks rally as tech shares climb - WSJ",
+              "Stocks fall as tech shares slide - WSJ"]
+    mock_news_client(monkeypatch, lambda request: httpx.Response(200, content=rss_feed(*titles)))
+    news = GoogleNewsTool(cache_feeds=False)
+
+    df = await news.aget_top_headlines(collapse_duplicates=True)
+
+    assert list(df["title"]) == [titles[0], titles[2], titles[3]]
+    assert list(df["story_size"]) == [2, 1, 1]
+    # Headlines that differ in a single entity are different stories
+    assert cluster_titles(["Earthquake strikes Japan - BBC", "Earthquake strikes Chile - BBC",
+                           "Biden meets Xi in San Francisco", "Biden meets Modi in San Francisco"]) == [0, 1, 2, 3]
+
+    downloads = []
+    wire = "The eruption began overnight and residents were moved to shelters. " * 20
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        downloads.append(request.url.path)
+        text = "Markets moved on earnings. " * 20 if "stocks" in request.url.path else wire
+        return httpx.Response(200, headers={"Content-Type": "text/plain"}, content=text.encode())
+
+    mock_news_client(monkeypatch, handler)
+    news.browser_tool = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+    articles = [(titles[0], "https://example.com/bbc"), (titles[1], "https://example.com/cnn"),
+                ("Authorities evacuate towns near eruption", "https://example.com/ap"),
+                (titles[2], "https://example.com/stocks")]
+
+    texts = await news.download_news_articles(articles)
+
+    assert sorted(downloads) == ["/ap", "/bbc", "/stocks"]
+    assert texts[1].startswith("DUPLICATE") and texts[2].startswith("DUPLICATE")
+    assert texts[0].startswith("PAGE") and texts[3].startswith("PAGE")
+
+
+@pytest.mark.asyncio
+async def test_news_archive_saves_and_searches_offline(monkeypatch) -> None:
+    """Test that fetched items and downloaded article text land in the archive once and are searchable."""
+    from datetime import date
+
+    feed = rss_feed("Volcano erupts in Iceland - BBC", "Central bank holds rates - Reuters")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "news.google.com":
+            return httpx.Response(200, content=feed)
+        return httpx.Response(200, headers={"Content-Type": "text/plain"},
+                              content=b"Lava reached the fishing town of Grindavik overnight.")
+
+    mock_news_client(monkeypatch, handler)
+    news = GoogleNewsTool(cache_feeds=False, archive_news=True)
+    news.browser_tool = ScaleSerpBrowserTool(page_cache=False, converter="inline")
+
+    df = await news.aget_top_headlines()
+    await news.aget_top_headlines()
+    await news.download_news_articles(df.head(1))
+
+    assert len(news.archive) == 2
+    assert list(news.search_news_archive("volcano")["title"]) == ["Volcano erupts in Iceland - BBC"]
+    assert list(news.search_news_archive("grindavik lava")["link"]) == [df["link"][0]]
+    assert len(news.search_news_archive(after=date(2024, 5, 1), before=date(2024, 5, 2))) == 2
+    assert len(news.search_news_archive("rates", after="2024-05-02")) == 0
+    assert GoogleNewsTool().search_news_archive("volcano").startswith("Error")
+
+    # A feed cached by an instance without an archive is still archived when served from the cache
+    monkeypatch.setattr(GoogleNewsTool, "feed_cache", TTLCache(ttl=60))
+    await GoogleNewsTool().aquery_topic("science")
+    archiving = GoogleNewsTool(archive_news=True)
+    await archiving.aquery_topic("science")
+    assert archiving.feed_cache_stats()["hits"] == 1
+    assert len(archiving.archive) == 2
+
+
+@pytest.mark.asyncio
+async def test_query_news_backfill_splits_full_windows(monkeypatch) -> None:
+    """Test that a back-fill covers a long range completely although each feed is capped."""
+    import re
+    from datetime import date, datetime, timedelta, timezone
+    from email.utils import format_datetime
+
+    per_day = 50
+    windows = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        q = request.url.params["q"]
+        after = date.fromisoformat(re.search(r"after:(\S+)", q).group(1))
+        before = date.fromisoformat(re.search(r"before:(\S+)", q).group(1))
+        windows.append((before - after).days)
+        items = []
+        day = before - timedelta(days=1)
+        while day >= after and len(items) < GoogleNewsTool.FEED_ITEM_CAP:
+            published = format_datetime(datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc), usegmt=True)
+            items.extend(
+                f"<item><title>Story {i} of {day}</title><link>https://example.com/{day}/{i}</link>"
+                f"<pubDate>{published}</pubDate><source>Example</source></item>"
+                for i in range(per_day)
+            )
+            day -= timedelta(days=1)
+        items = items[:GoogleNewsTool.FEED_ITEM_CAP]
+        return httpx.Response(200, content=f"<rss><channel>{''.join(items)}</channel></rss>".encode())
+
+    mock_news_client(monkeypatch, handler)
+    news = GoogleNewsTool(cache_feeds=False, track_trends=False)
+
+    df = await news.aquery_news("volcano", after=date(2024, 5, 1), before=date(2024, 5, 13),
+                                backfill=True, max_concurrency=4)
+
+    assert len(df) == 12 * per_day
+    assert df["link"].is_unique
+    assert df["pubDate"].is_monotonic_decreasing
+    # Four 3-day windows come back full, each is split into 1 + 2 days, and the 2 days into 1 + 1
+    assert sorted(windows) == [1] * 12 + [2] * 4 + [3] * 4
+
+
 if __name__ == "__main__":
     # For manual testing/debugging
     asyncio.run(test_linkedin_people_search())